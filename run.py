@@ -3,7 +3,8 @@ Travin Canvas Application Launcher
 
 This script provides a convenient way to start the Travin Canvas application
 using the Streamlit CLI. It handles locating the main application file,
-launching the Streamlit server, and managing any errors that occur during startup.
+launching the Streamlit server in the current process, and managing any errors
+that occur during startup.
 
 Key features:
 - Simple one-command application startup
@@ -15,22 +16,64 @@ Usage:
     python run.py
 
 Dependencies:
-- subprocess: For running the Streamlit CLI
+- streamlit.web.cli: For running the Streamlit server in-process
+- streamlit.config: For the locations of the user's Streamlit config files
+- toml: For reading the Streamlit config files
+- utils.config: For the upload size limit
 - os: For file path operations
 - sys: For exit code management
 """
 
 import os
-import subprocess
 import sys
 import time
+import toml
+from streamlit import config as stconfig
+from streamlit.web import cli as stcli
+
+# Absolute path to the application sources and the main.py file, resolved once at import
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+MAIN_PY_PATH = os.path.join(SRC_PATH, "main.py")
+
+# The upload limit is shared with the canvas, which imports it from the same module
+sys.path.insert(0, SRC_PATH)
+from utils.config import MAX_UPLOAD_MB
+
+def _upload_size_configured():
+    """
+    Check whether the Streamlit upload size limit is set by the user.
+    
+    Returns:
+        bool: Whether server.maxUploadSize is set in a Streamlit config.toml
+            or through the STREAMLIT_SERVER_MAX_UPLOAD_SIZE environment variable
+    """
+    if "STREAMLIT_SERVER_MAX_UPLOAD_SIZE" in os.environ:
+        return True
+    
+    # The files are read directly: loading Streamlit's configuration here
+    # would make the CLI report a changed [server] section when it loads
+    # the configuration again with the command line flags
+    for filename in stconfig.CONFIG_FILENAMES:
+        if not os.path.exists(filename):
+            continue
+        try:
+            settings = toml.load(filename)
+        except (OSError, toml.TomlDecodeError) as e:
+            print(f"Could not read {filename}: {e}")
+            continue
+        if "maxUploadSize" in settings.get("server", {}):
+            return True
+    return False
 
 def main():
     """
     Run the Travin Canvas application.
     
-    This function locates the main.py file, verifies its existence,
-    and launches the Streamlit server to run the application.
+    This function launches the Streamlit server to run the main.py file.
+    A missing file is reported by the Streamlit CLI itself, which checks
+    the script path before starting the server.
+    The server runs in this interpreter rather than a child process,
+    which avoids starting and importing Streamlit a second time.
     It handles errors gracefully and provides appropriate feedback
     to the user in case of failures.
     
@@ -38,21 +81,21 @@ def main():
     - 0: Successful execution or clean shutdown
     - 1: Error (file not found, Streamlit error, or unexpected exception)
     """
-    # Get the absolute path to the main.py file
-    main_py_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "main.py")
-    
-    # Check if the file exists
-    if not os.path.exists(main_py_path):
-        print(f"Error: Could not find {main_py_path}")
-        sys.exit(1)
-    
     # Run the Streamlit application
     print("Starting Travin Canvas...")
     try:
-        subprocess.run(["streamlit", "run", main_py_path], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Error running Streamlit: {e}")
-        sys.exit(1)
+        # Equivalent to `streamlit run main.py`, without spawning a new interpreter
+        sys.argv = ["streamlit", "run", MAIN_PY_PATH]
+        # Refuse larger files before they are buffered, unless the user has
+        # configured the upload size themselves
+        if not _upload_size_configured():
+            sys.argv += ["--server.maxUploadSize", str(MAX_UPLOAD_MB)]
+        stcli.main()
+    except SystemExit as e:
+        # The Streamlit CLI always exits through SystemExit; only non-zero codes are errors
+        if e.code:
+            print(f"Error running Streamlit: exit code {e.code}")
+            sys.exit(1)
     except KeyboardInterrupt:
         # Print consistent shutdown messages
         print("\nStopping...")
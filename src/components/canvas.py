@@ -17,16 +17,361 @@ Dependencies:
 - streamlit: For UI components
 - utils.markdown_utils: For markdown processing
 - utils.llm_utils: For LLM-powered enhancements
+- docx: For Word document import (imported on first use)
+- fitz (PyMuPDF): For fast PDF text extraction, with PyPDF2 as a fallback
+  (imported on first use)
+- pdftotext (optional, Poppler): Used for PDF extraction when installed
 """
 
 import os
+import re
 import json
 import streamlit as st
 from utils.markdown_utils import MarkdownProcessor
 from utils.llm_utils import LLMManager
-import docx
-from PyPDF2 import PdfReader
+from utils.config import MAX_UPLOAD_MB
 import io
+import time
+import shutil
+import subprocess
+import importlib.util
+from collections import deque
+
+# PyMuPDF binds the MuPDF C library and extracts text far faster than the
+# pure-Python PyPDF2, which is kept as a fallback. The document parsers are
+# only imported when a file of their type is uploaded; here we just check
+# which PDF parser is installed.
+_HAS_PYMUPDF = importlib.util.find_spec("fitz") is not None
+
+@st.cache_resource
+def _get_markdown_processor():
+    """Create the markdown processor once per process and share it across reruns."""
+    return MarkdownProcessor()
+
+@st.cache_resource
+def _get_llm_manager():
+    """
+    Create the canvas LLM manager once per process and share it across reruns.
+    
+    The canvas only uses the stateless document helpers of the manager, so a
+    single instance can safely be shared between sessions.
+    """
+    return LLMManager()
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _render_markdown_html(markdown_text):
+    """
+    Render markdown to HTML, cached on the text across sessions and reruns.
+    
+    Args:
+        markdown_text (str): The markdown to render
+        
+    Returns:
+        str: The rendered HTML
+    """
+    return _get_markdown_processor().render_html(markdown_text)
+
+# A word is any run of non-whitespace characters, matching str.split()
+_WORD_PATTERN = re.compile(r'\S+')
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _count_words_and_chars(text):
+    """
+    Count the words and characters of a document.
+    
+    The result is cached on the text, so the count is only recomputed when
+    the document changes, and words are counted without building a list
+    of all tokens.
+    
+    Args:
+        text (str): The document text
+        
+    Returns:
+        tuple: (word count, character count)
+    """
+    return sum(1 for _ in _WORD_PATTERN.finditer(text)), len(text)
+
+# Documents shorter than this many characters are always previewed in full
+PREVIEW_LAZY_THRESHOLD = 16_000
+
+# Number of top-level blocks shown per page of a long preview
+PREVIEW_PAGE_BLOCKS = 50
+
+# Editor changes are coalesced into one undo step unless this many seconds
+# have passed since the last snapshot or the length changed by more than
+# HISTORY_DEBOUNCE_CHARS characters
+HISTORY_DEBOUNCE_SECONDS = 1.0
+HISTORY_DEBOUNCE_CHARS = 32
+
+# Largest markdown/text upload accepted, in bytes. Bigger files would make
+# the editor and preview unusably slow, so they are rejected before decoding.
+MAX_TEXT_UPLOAD_BYTES = 2 * 1024 * 1024
+
+# Largest Word/PDF upload accepted, in bytes. run.py passes the same limit to
+# the Streamlit server, so bigger files are refused before they are buffered.
+MAX_DOCUMENT_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+
+# Poppler's pdftotext, when installed, is used ahead of the Python parsers
+_PDFTOTEXT = shutil.which("pdftotext")
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parse_docx_bytes(data):
+    """
+    Extract the text of a Word document.
+    
+    The result is cached on the file contents, so uploading the same
+    document again returns without parsing it.
+    
+    Args:
+        data (bytes): The raw .docx file
+        
+    Returns:
+        str: The text of the paragraphs and table rows, separated by blank lines
+    """
+    import docx
+    
+    doc = docx.Document(io.BytesIO(data))
+    
+    # Extract text from paragraphs. Paragraph and cell text is rebuilt from
+    # the XML on every access, so each is read only once.
+    full_text = [text for para in doc.paragraphs if (text := para.text)]
+    
+    # Extract text from tables, one line per row with text
+    table_rows = (
+        " | ".join(text for cell in row.cells if (text := cell.text))
+        for table in doc.tables
+        for row in table.rows
+    )
+    full_text.extend(row_text for row_text in table_rows if row_text)
+    
+    return "\n\n".join(full_text)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parse_pdf_bytes(data):
+    """
+    Extract the text of a PDF file.
+    
+    The result is cached on the file contents, so uploading the same
+    document again returns without parsing it.
+    
+    Args:
+        data (bytes): The raw PDF file
+        
+    Returns:
+        str: The text of each page with text, separated by blank lines
+    """
+    if _PDFTOTEXT:
+        try:
+            result = subprocess.run(
+                [_PDFTOTEXT, "-enc", "UTF-8", "-", "-"],
+                input=data,
+                capture_output=True,
+                check=True
+            )
+            # pdftotext ends every page with a form feed
+            page_texts = result.stdout.decode("utf-8", errors="replace").split("\f")
+            return "\n\n".join(text for text in page_texts if text.strip())
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"pdftotext failed, falling back to the Python parser: {str(e)}")
+    
+    if _HAS_PYMUPDF:
+        import fitz
+        
+        # Pages are extracted serially. PyMuPDF holds the GIL and doesn't
+        # support threads, and a process pool would copy the whole file to
+        # every worker; pdftotext above is the fast path for large PDFs.
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            page_texts = [page.get_text("text") for page in doc]
+    else:
+        from PyPDF2 import PdfReader
+        
+        pdf_reader = PdfReader(io.BytesIO(data))
+        page_texts = [page.extract_text() for page in pdf_reader.pages]
+    
+    # Skip pages without any extractable text
+    return "\n\n".join(text for text in page_texts if text)
+
+# Minimal CSS for basic layout. It is re-emitted on every run because Streamlit
+# removes elements that a rerun doesn't render again, but the string itself
+# is built once at import time.
+_CANVAS_CSS = """
+<style>
+.stButton button {
+    font-weight: 500;
+}
+</style>
+"""
+
+# Opening or closing line of a fenced code block. Any indentation is
+# accepted, so fences nested in list items are tracked as well.
+_FENCE_PATTERN = re.compile(r'^\s*(`{3,}|~{3,})')
+
+# First line of a list item
+_LIST_ITEM_PATTERN = re.compile(r'^(?:[-*+]|\d{1,9}[.)])(?:\s|$)')
+
+# Raw HTML blocks that may contain blank lines, with the pattern that ends them
+_RAW_HTML_BLOCKS = (
+    (re.compile(r'^ {0,3}<(?:pre|script|style|textarea)\b', re.IGNORECASE),
+     re.compile(r'</(?:pre|script|style|textarea)>', re.IGNORECASE)),
+    (re.compile(r'^ {0,3}<!--'), re.compile(r'-->')),
+)
+
+# Link reference definition, e.g. "[docs]: https://example.com"
+_LINK_DEFINITION_PATTERN = re.compile(r'^ {0,3}\[[^\]]+\]:[ \t]*\S.*$', re.MULTILINE)
+
+def _split_blocks(text):
+    """
+    Split markdown text into top-level blocks.
+    
+    A block only ends at a blank line that is followed by an unindented
+    line starting a new top-level construct. Blank lines inside fenced code
+    blocks, raw HTML blocks and list items (including indented continuation
+    paragraphs and nested fences) do not end a block, so each block renders
+    the same on its own as it does as part of the whole document.
+    
+    Args:
+        text (str): The markdown text to split
+        
+    Returns:
+        list: The top-level blocks of the document
+    """
+    blocks = []
+    current = []
+    fence = None
+    raw_html_end = None
+    after_blank = False
+    in_list = False
+    
+    for line in text.split("\n"):
+        is_blank = not line.strip()
+        
+        # Start a new block at an unindented line after a blank line, unless
+        # the line continues the list the current block ends with
+        if (
+            after_blank
+            and not is_blank
+            and not line[0].isspace()
+            and not (in_list and _LIST_ITEM_PATTERN.match(line))
+        ):
+            blocks.append("\n".join(current).rstrip())
+            current = []
+        
+        if not current and is_blank:
+            continue
+        current.append(line)
+        
+        if fence:
+            # A fence is closed by a run of the same character that is at least as long
+            match = _FENCE_PATTERN.match(line)
+            if match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence):
+                fence = None
+        elif raw_html_end:
+            if raw_html_end.search(line):
+                raw_html_end = None
+        elif not is_blank:
+            if match := _FENCE_PATTERN.match(line):
+                fence = match.group(1)
+            else:
+                for start_pattern, end_pattern in _RAW_HTML_BLOCKS:
+                    if (start := start_pattern.match(line)) and not end_pattern.search(line, start.end()):
+                        raw_html_end = end_pattern
+                        break
+            
+            # Unindented lines decide whether the block currently ends in a list
+            if not line[0].isspace():
+                in_list = bool(_LIST_ITEM_PATTERN.match(line))
+        
+        after_blank = is_blank and fence is None and raw_html_end is None
+    
+    if current:
+        blocks.append("\n".join(current).rstrip())
+    
+    return blocks
+
+def _link_definitions(blocks):
+    """
+    Collect the link reference definitions from markdown blocks.
+    
+    Args:
+        blocks (list): Blocks as returned by _split_blocks
+        
+    Returns:
+        list: The definition lines, outside of fenced code blocks
+    """
+    return [
+        definition
+        for block in blocks
+        if not _FENCE_PATTERN.match(block)
+        for definition in _LINK_DEFINITION_PATTERN.findall(block)
+    ]
+
+# Slice size used to find the unchanged head and tail of two document versions
+_PATCH_CHUNK = 4096
+
+def _common_prefix_length(a, b, limit):
+    """Return the length of the common prefix of two strings, capped at limit."""
+    i = 0
+    while i < limit:
+        end = min(i + _PATCH_CHUNK, limit)
+        # Compare whole slices in C and only walk characters inside the chunk that differs
+        if a[i:end] != b[i:end]:
+            while a[i] == b[i]:
+                i += 1
+            return i
+        i = end
+    return limit
+
+def _common_suffix_length(a, b, limit):
+    """Return the length of the common suffix of two strings, capped at limit."""
+    len_a, len_b = len(a), len(b)
+    i = 0
+    while i < limit:
+        end = min(i + _PATCH_CHUNK, limit)
+        if a[len_a - end:len_a - i] != b[len_b - end:len_b - i]:
+            while a[len_a - 1 - i] == b[len_b - 1 - i]:
+                i += 1
+            return i
+        i = end
+    return limit
+
+def _make_patch(source, target):
+    """
+    Build a patch that turns source into target.
+    
+    The patch keeps only the region between the unchanged head and tail
+    of the two strings, which for typical edits is a handful of characters.
+    
+    Args:
+        source (str): The text the patch will be applied to
+        target (str): The text the patch should produce
+        
+    Returns:
+        tuple: (prefix length, suffix length, replacement text)
+    """
+    limit = min(len(source), len(target))
+    prefix = _common_prefix_length(source, target, limit)
+    suffix = _common_suffix_length(source, target, limit - prefix)
+    return prefix, suffix, target[prefix:len(target) - suffix]
+
+def _apply_patch(source, patch):
+    """Apply a patch created by _make_patch to source."""
+    prefix, suffix, replacement = patch
+    return source[:prefix] + replacement + source[len(source) - suffix:]
+
+# Number of trailing characters compared before falling back to a full comparison
+_FINGERPRINT_TAIL = 4096
+
+def _content_changed(old, new):
+    """
+    Check whether two versions of the document differ.
+    
+    Typing mostly happens near the end of the document, so the lengths and
+    tails are compared first; the full texts are only compared when both
+    match, which is the common case of a rerun without an edit.
+    """
+    if len(old) != len(new) or old[-_FINGERPRINT_TAIL:] != new[-_FINGERPRINT_TAIL:]:
+        return True
+    return old != new
 
 class MarkdownCanvas:
     """
@@ -49,44 +394,40 @@ class MarkdownCanvas:
         Args:
             on_content_change (callable, optional): Callback for content changes
         """
-        self.markdown_processor = MarkdownProcessor()
-        self.llm_manager = LLMManager()
+        self.markdown_processor = _get_markdown_processor()
+        self.llm_manager = _get_llm_manager()
         self.on_content_change = on_content_change
         
-        # Initialize session state variables
-        if "markdown_content" not in st.session_state:
-            st.session_state.markdown_content = ""
-            
-        if "view_mode" not in st.session_state:
-            st.session_state.view_mode = "editor"
-            
-        if "current_file" not in st.session_state:
-            st.session_state.current_file = None
-            
-        # Initialize undo history
+        # Initialize session state variables in one pass, so the methods below
+        # can rely on every key being present
+        for key, default in (
+            ("markdown_content", ""),
+            ("view_mode", "editor"),
+            ("current_file", None),
+            ("max_history", 10),
+            # Add a flag to track file processing status
+            ("file_processed", False),
+            ("last_uploaded_file", None),
+            # Number of blocks rendered in the preview of a long document
+            ("preview_window", PREVIEW_PAGE_BLOCKS),
+            # Most recent undo snapshot, kept in full
+            ("undo_baseline", None),
+            # Time of the last snapshot taken from an editor change
+            ("last_history_ts", 0.0),
+            # Hash of the content last passed to on_content_change
+            ("last_notified_hash", None),
+        ):
+            st.session_state.setdefault(key, default)
+        
+        # Older undo versions are stored as patches against the version after
+        # them, in a bounded ring buffer that evicts in O(1)
         if "undo_history" not in st.session_state:
-            st.session_state.undo_history = []
-            
-        if "max_history" not in st.session_state:
-            st.session_state.max_history = 10
-            
-        # Add a flag to track file processing status
-        if "file_processed" not in st.session_state:
-            st.session_state.file_processed = False
-            
-        if "last_uploaded_file" not in st.session_state:
-            st.session_state.last_uploaded_file = None
+            st.session_state.undo_history = deque(maxlen=st.session_state.max_history - 1)
     
     def render(self):
         """Render the markdown canvas."""
         # Minimal CSS for basic layout
-        st.markdown("""
-        <style>
-        .stButton button {
-            font-weight: 500;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        st.markdown(_CANVAS_CSS, unsafe_allow_html=True)
         
         # Display current file name if available
         if st.session_state.current_file:
@@ -95,19 +436,22 @@ class MarkdownCanvas:
         # Combined toolbar with all controls in a single row
         col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
         
+        # Toolbar buttons update state in on_click callbacks, which run before
+        # the rerun that Streamlit triggers for the click, so no extra
+        # st.rerun() round-trip is needed to show the new state
+        
         # New document button
         with col1:
-            if st.button("📄 New", use_container_width=True):
-                # Save current state to history before clearing
-                self._save_to_history()
-                st.session_state.markdown_content = ""
-                st.session_state.current_file = None
-                st.rerun()
+            st.button("📄 New", use_container_width=True, on_click=self._new_document)
         
         # Undo button
         with col2:
-            if st.button("↩️ Undo", disabled=len(st.session_state.undo_history) == 0, use_container_width=True):
-                self._undo_last_change()
+            st.button(
+                "↩️ Undo",
+                disabled=st.session_state.undo_baseline is None,
+                use_container_width=True,
+                on_click=self._undo_last_change
+            )
         
         # File uploader
         with col3:
@@ -115,60 +459,77 @@ class MarkdownCanvas:
             
             # Process the file only if it's a new file or hasn't been processed yet
             if uploaded_file and (uploaded_file != st.session_state.last_uploaded_file or not st.session_state.file_processed):
-                try:
-                    # Save current state to history before loading new file
-                    self._save_to_history()
-                    
-                    # Update the last uploaded file
-                    st.session_state.last_uploaded_file = uploaded_file
-                    st.session_state.file_processed = False
-                    
-                    # Process the file based on its type
-                    file_extension = uploaded_file.name.split('.')[-1].lower()
-                    
-                    # Add a status message
-                    with st.status(f"Processing {file_extension} file: {uploaded_file.name}...", expanded=True) as status:
-                        if file_extension in ['md', 'txt']:
-                            # Handle markdown and text files
-                            content = uploaded_file.getvalue().decode("utf-8")
-                            st.session_state.markdown_content = content
-                            status.update(label=f"Loaded text file: {len(content)} characters", state="complete")
-                        elif file_extension == 'docx':
-                            # Handle Word documents
-                            content = self._extract_text_from_docx(uploaded_file)
-                            st.session_state.markdown_content = content
-                            status.update(label=f"Converted Word document: {len(content)} characters", state="complete")
-                        elif file_extension == 'pdf':
-                            # Handle PDF files
-                            content = self._extract_text_from_pdf(uploaded_file)
-                            st.session_state.markdown_content = content
-                            status.update(label=f"Converted PDF file: {len(content)} characters", state="complete")
-                        
-                        st.session_state.current_file = uploaded_file.name
+                # Refuse oversized files before decoding or parsing them
+                file_extension = uploaded_file.name.split('.')[-1].lower()
+                if file_extension in ['md', 'txt']:
+                    size_limit, file_kind = MAX_TEXT_UPLOAD_BYTES, "Text files"
+                else:
+                    size_limit, file_kind = MAX_DOCUMENT_UPLOAD_BYTES, "Documents"
+                if uploaded_file.size > size_limit:
+                    st.error(
+                        f"File too large: {uploaded_file.name} is {uploaded_file.size / (1024 * 1024):.1f} MB. "
+                        f"{file_kind} are limited to {size_limit // (1024 * 1024)} MB."
+                    )
+                else:
+                    try:
+                        # Save current state to history before loading new file
+                        self._save_to_history()
                         
-                        # Notify about content change
-                        if self.on_content_change:
-                            self.on_content_change(st.session_state.markdown_content)
+                        # Update the last uploaded file
+                        st.session_state.last_uploaded_file = uploaded_file
+                        st.session_state.file_processed = False
                         
-                        # Mark as processed to avoid reprocessing
-                        st.session_state.file_processed = True
-                except Exception as e:
-                    st.error(f"Error processing file: {str(e)}")
-                    import traceback
-                    st.error(traceback.format_exc())
+                        # Add a status message
+                        with st.status(f"Processing {file_extension} file: {uploaded_file.name}...", expanded=True) as status:
+                            if file_extension in ['md', 'txt']:
+                                # Handle markdown and text files. getvalue() returns the
+                                # upload buffer without copying it, so decoding is the only copy
+                                content = uploaded_file.getvalue().decode("utf-8")
+                                st.session_state.markdown_content = content
+                                status.update(label=f"Loaded text file: {len(content)} characters", state="complete")
+                            elif file_extension == 'docx':
+                                # Handle Word documents
+                                content = self._extract_text_from_docx(uploaded_file)
+                                st.session_state.markdown_content = content
+                                status.update(label=f"Converted Word document: {len(content)} characters", state="complete")
+                            elif file_extension == 'pdf':
+                                # Handle PDF files
+                                content = self._extract_text_from_pdf(uploaded_file)
+                                st.session_state.markdown_content = content
+                                status.update(label=f"Converted PDF file: {len(content)} characters", state="complete")
+                            
+                            st.session_state.current_file = uploaded_file.name
+                            
+                            # Notify about content change
+                            self._notify_content_change(st.session_state.markdown_content)
+                            
+                            # Mark as processed to avoid reprocessing
+                            st.session_state.file_processed = True
+                    except Exception as e:
+                        st.error(f"Error processing file: {str(e)}")
+                        import traceback
+                        st.error(traceback.format_exc())
         
         # Toggle between editor and preview modes
         with col4:
             editor_button_style = "primary" if st.session_state.view_mode == "editor" else "secondary"
-            if st.button("✏️ Edit", type=editor_button_style, use_container_width=True):
-                st.session_state.view_mode = "editor"
-                st.rerun()
+            st.button(
+                "✏️ Edit",
+                type=editor_button_style,
+                use_container_width=True,
+                on_click=self._set_view_mode,
+                args=("editor",)
+            )
         
         with col5:
             preview_button_style = "primary" if st.session_state.view_mode == "preview" else "secondary"
-            if st.button("👁️ View", type=preview_button_style, use_container_width=True):
-                st.session_state.view_mode = "preview"
-                st.rerun()
+            st.button(
+                "👁️ View",
+                type=preview_button_style,
+                use_container_width=True,
+                on_click=self._set_view_mode,
+                args=("preview",)
+            )
         
         # Render based on selected view mode
         if st.session_state.view_mode == "editor":
@@ -176,6 +537,30 @@ class MarkdownCanvas:
         else:
             self._render_preview()
     
+    def _new_document(self):
+        """Start a new, empty document (toolbar callback)."""
+        # Save current state to history before clearing
+        self._save_to_history()
+        st.session_state.markdown_content = ""
+        st.session_state.current_file = None
+    
+    def _set_view_mode(self, view_mode):
+        """
+        Switch between the editor and the preview (toolbar callback).
+        
+        Args:
+            view_mode (str): Either "editor" or "preview"
+        """
+        st.session_state.view_mode = view_mode
+        
+        # Long documents start again from the first page of the preview
+        if view_mode == "preview":
+            st.session_state.preview_window = PREVIEW_PAGE_BLOCKS
+    
+    def _load_more_preview(self):
+        """Extend the preview of a long document by another page of blocks."""
+        st.session_state.preview_window += PREVIEW_PAGE_BLOCKS
+    
     def _extract_text_from_docx(self, docx_file):
         """
         Extract text from a Word document.
@@ -187,33 +572,7 @@ class MarkdownCanvas:
             str: The extracted text content
         """
         try:
-            # Load the document
-            doc_bytes = docx_file.getvalue()
-            
-            doc = docx.Document(io.BytesIO(doc_bytes))
-            full_text = []
-            
-            # Extract text from paragraphs
-            paragraph_count = 0
-            for para in doc.paragraphs:
-                if para.text:
-                    full_text.append(para.text)
-                    paragraph_count += 1
-            
-            # Extract text from tables
-            table_count = 0
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = []
-                    for cell in row.cells:
-                        if cell.text:
-                            row_text.append(cell.text)
-                    if row_text:
-                        full_text.append(" | ".join(row_text))
-                        table_count += 1
-            
-            result = "\n\n".join(full_text)
-            return result
+            return _parse_docx_bytes(docx_file.getvalue())
         except Exception as e:
             st.error(f"Error processing Word document: {str(e)}")
             import traceback
@@ -231,23 +590,7 @@ class MarkdownCanvas:
             str: The extracted text content
         """
         try:
-            # Load the PDF
-            pdf_bytes = pdf_file.getvalue()
-            
-            pdf_reader = PdfReader(io.BytesIO(pdf_bytes))
-            full_text = []
-            
-            # Extract text from each page
-            page_count = len(pdf_reader.pages)
-            
-            for page_num in range(page_count):
-                page = pdf_reader.pages[page_num]
-                text = page.extract_text()
-                if text:
-                    full_text.append(text)
-            
-            result = "\n\n".join(full_text)
-            return result
+            return _parse_pdf_bytes(pdf_file.getvalue())
         except Exception as e:
             st.error(f"Error processing PDF file: {str(e)}")
             import traceback
@@ -261,27 +604,37 @@ class MarkdownCanvas:
         Displays a full-width text area for editing markdown content with
         syntax highlighting and proper styling.
         """
-        # Markdown editor with improved styling
-        new_content = st.text_area(
+        # Markdown editor with improved styling. Edits are applied by the
+        # on_change callback, so reruns that don't touch the editor skip the
+        # comparison against the stored document entirely.
+        st.text_area(
             "Edit your document here",
             value=st.session_state.markdown_content,
             height=500,  # Increased height for better editing experience
             label_visibility="collapsed",
-            key="markdown_editor"
+            key="markdown_editor",
+            on_change=self._on_edit
         )
         
         # Display word count
-        word_count = len(new_content.split()) if new_content else 0
-        char_count = len(new_content) if new_content else 0
+        content = st.session_state.markdown_content
+        word_count, char_count = _count_words_and_chars(content) if content else (0, 0)
         st.caption(f"Word count: {word_count} | Character count: {char_count}")
+    
+    def _on_edit(self):
+        """Apply an edit from the editor widget to the document (editor callback)."""
+        new_content = st.session_state.markdown_editor
+        if not _content_changed(st.session_state.markdown_content, new_content):
+            return
         
-        # Update content if changed
-        if new_content != st.session_state.markdown_content:
-            # Save current state to history before updating
+        # Save current state to history before updating, coalescing rapid edits
+        now = time.monotonic()
+        length_delta = abs(len(new_content) - len(st.session_state.markdown_content))
+        if now - st.session_state.last_history_ts > HISTORY_DEBOUNCE_SECONDS or length_delta > HISTORY_DEBOUNCE_CHARS:
             self._save_to_history()
-            st.session_state.markdown_content = new_content
-            if self.on_content_change:
-                self.on_content_change(new_content)
+            st.session_state.last_history_ts = now
+        st.session_state.markdown_content = new_content
+        self._notify_content_change(new_content)
     
     def _render_preview(self):
         """
@@ -295,6 +648,10 @@ class MarkdownCanvas:
         rather than custom HTML/CSS containers. This approach eliminates the excessive whitespace
         issues that can occur with custom containers and provides a cleaner, more consistent
         rendering of the markdown content.
+        
+        Long documents are rendered lazily: only the first page of top-level
+        blocks is converted to HTML, and a "Load more" button extends the
+        preview by another page.
         """
         # Add download button at the top
         if st.session_state.markdown_content:
@@ -308,43 +665,70 @@ class MarkdownCanvas:
             
             # Use a single expander that's always expanded to contain the content
             # This helps eliminate whitespace issues by using Streamlit's native components
+            content = st.session_state.markdown_content
+            remaining = 0
+            
+            # Short documents skip the paging machinery entirely. Long ones
+            # show a prefix that ends at a top-level block boundary, followed
+            # by the link definitions from the hidden part so references in
+            # the visible text still resolve.
+            if len(content) >= PREVIEW_LAZY_THRESHOLD:
+                blocks = _split_blocks(content)
+                visible_blocks = blocks[:st.session_state.preview_window]
+                remaining = len(blocks) - len(visible_blocks)
+                if remaining:
+                    content = "\n\n".join(visible_blocks + _link_definitions(blocks[len(visible_blocks):]))
+            
             with st.expander("", expanded=True):
-                # Apply minimal styling to the content
-                st.markdown(st.session_state.markdown_content)
+                # The visible markdown is rendered in one pass, cached on its text
+                st.html(_render_markdown_html(content))
+            
+            if remaining:
+                st.button(
+                    f"Load more ({remaining} sections remaining)",
+                    on_click=self._load_more_preview
+                )
         else:
             st.info("Your document preview will appear here. Switch to the Editor to start writing.")
     
     def _save_to_history(self):
-        """Save current content to undo history."""
+        """
+        Save current content to undo history.
+        
+        The previous snapshot is replaced by a patch that restores it from the
+        current content, so each save only retains the changed region.
+        """
         # Only save if there's content and it's different from the last saved state
-        if "markdown_content" in st.session_state and st.session_state.markdown_content:
-            # Initialize history if not exists
-            if "undo_history" not in st.session_state:
-                st.session_state.undo_history = []
-                
+        if st.session_state.markdown_content:
+            content = st.session_state.markdown_content
+            baseline = st.session_state.undo_baseline
+            
             # Add current content to history if different from last entry
-            if not st.session_state.undo_history or st.session_state.markdown_content != st.session_state.undo_history[-1]:
-                st.session_state.undo_history.append(st.session_state.markdown_content)
-                
-                # Limit history size
-                if len(st.session_state.undo_history) > 10:  # Hardcoded limit to avoid potential issues
-                    st.session_state.undo_history = st.session_state.undo_history[-10:]
+            # (the deque drops the oldest patch once it is full)
+            if baseline is None:
+                st.session_state.undo_baseline = content
+            elif _content_changed(baseline, content):
+                st.session_state.undo_history.append(_make_patch(content, baseline))
+                st.session_state.undo_baseline = content
     
     def _undo_last_change(self):
         """Undo the last change by restoring content from history."""
-        if "undo_history" in st.session_state and st.session_state.undo_history:
-            # Get the previous content (last item in history)
-            previous_content = st.session_state.undo_history.pop()
+        if st.session_state.undo_baseline is not None:
+            # Get the previous content (the most recent snapshot)
+            previous_content = st.session_state.undo_baseline
+            
+            # Rebuild the snapshot before it from the newest patch
+            if st.session_state.undo_history:
+                patch = st.session_state.undo_history.pop()
+                st.session_state.undo_baseline = _apply_patch(previous_content, patch)
+            else:
+                st.session_state.undo_baseline = None
             
             # Update the content
             st.session_state.markdown_content = previous_content
             
             # Notify about content change
-            if self.on_content_change:
-                self.on_content_change(previous_content)
-            
-            # Rerun to update the UI
-            st.rerun()
+            self._notify_content_change(previous_content)
     
     def get_content(self):
         """
@@ -353,7 +737,7 @@ class MarkdownCanvas:
         Returns:
             str: The current markdown content
         """
-        return st.session_state.markdown_content if "markdown_content" in st.session_state else ""
+        return st.session_state.markdown_content
     
     def set_content(self, content, save_history=True):
         """
@@ -363,10 +747,25 @@ class MarkdownCanvas:
             content (str): The new content
             save_history (bool): Whether to save the current content to history
         """
-        if save_history and "markdown_content" in st.session_state:
+        if save_history:
             self._save_to_history()
             
         st.session_state.markdown_content = content
         
-        if self.on_content_change:
-            self.on_content_change(content) 
\ No newline at end of file
+        self._notify_content_change(content)
+    
+    def _notify_content_change(self, content):
+        """
+        Pass content to the on_content_change callback unless it was the last
+        content the callback received.
+        
+        Args:
+            content (str): The new content
+        """
+        if not self.on_content_change:
+            return
+        
+        content_hash = hash(content)
+        if content_hash != st.session_state.last_notified_hash:
+            self.on_content_change(content)
+            st.session_state.last_notified_hash = content_hash
@@ -8,31 +8,214 @@ The component creates a conversational experience that integrates with the markd
 Key features:
 - Text-based chat with OpenAI's GPT models using function calling
 - Integration with Perplexity AI for search and research capabilities
-- Support for research commands via n8n webhooks
+- Support for research commands via n8n webhooks, run in the background
 - Document-aware conversations with context management
+- Streaming display of responses while they are generated
 
 Dependencies:
 - streamlit: For UI components
 - utils.llm_utils: For LLM interactions
-- utils.webhook_utils: For external integrations
+- utils.config: For environment configuration
 """
 
-import os
+import re
 import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import Future
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 from utils.llm_utils import LLMManager
-from utils.webhook_utils import WebhookManager
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from utils.config import get_config
 
 # Access global configuration
-use_azure = os.getenv("USE_AZURE", "false").lower() == "true"
-use_n8n = os.getenv("USE_N8N", "false").lower() == "true"
-use_perplexity = os.getenv("USE_PERPLEXITY", "false").lower() == "true"
-azure_model = os.getenv("AZURE_MODEL", "")
-openai_model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+config = get_config()
+use_azure = config.use_azure
+use_n8n = config.use_n8n
+use_perplexity = config.use_perplexity
+azure_model = config.azure_model
+openai_model = config.openai_model
+
+# Determine LLM provider and model for the configuration message
+if use_azure:
+    llm_provider = "Azure OpenAI"
+    llm_model = azure_model
+else:
+    llm_provider = "OpenAI"
+    llm_model = openai_model
+
+# Configuration information shown as the first message of every chat. The
+# settings are read once at import, so the message is only formatted once.
+CONFIG_INFO_MESSAGE = f"""
+**System Configuration:**
+- **LLM Provider:** {llm_provider}
+- **Model:** {llm_model}
+- **N8N Integration:** {'Enabled' if use_n8n else 'Disabled'}
+- **Perplexity Integration:** {'Enabled' if use_perplexity else 'Disabled'}
+"""
+
+# System messages informing the LLM about its capabilities, with and
+# without Perplexity search
+CAPABILITIES_MESSAGE_WITH_SEARCH = """
+You are an AI assistant with two main capabilities:
+
+1. Document Editing:
+   When the user asks you to create, format, edit, or modify their document:
+   - Understand what changes they want to make
+   - Generate the appropriate content or modifications
+   - Use the phrase "I'll update the document with:" followed by the content
+
+2. Information Retrieval:
+   You have access to two special functions for retrieving information:
+   - search_with_perplexity: Use this to search the internet for general information and current events
+   - research_with_perplexity: Use this for in-depth research with comprehensive citations
+
+EXTREMELY IMPORTANT INSTRUCTIONS:
+
+When the user asks ANY question about:
+- News or current events
+- Recent developments or updates
+- Facts that might have changed since your training
+- "What is X" or "Tell me about X" questions
+- Any topic where up-to-date information would be valuable
+
+You MUST use one of your search functions rather than responding from your training data.
+DO NOT try to answer these questions directly - ALWAYS use the appropriate function.
+
+Examples of when to use search_with_perplexity:
+- "What are today's top headlines?"
+- "Tell me about recent developments in AI"
+- "What is the current situation in Ukraine?"
+- "Who is the current CEO of Apple?"
+- "What's the weather like in New York today?"
+
+Examples of when to use research_with_perplexity:
+- "I need detailed research on climate change impacts"
+- "Provide a comprehensive analysis of quantum computing"
+- "Give me an in-depth literature review on cancer treatments"
+- "What are the scholarly perspectives on consciousness?"
+"""
+
+CAPABILITIES_MESSAGE = """
+You are an AI assistant focused on document editing.
+
+When the user asks you to create, format, edit, or modify their document:
+- Understand what changes they want to make
+- Generate the appropriate content or modifications
+- Use the phrase "I'll update the document with:" followed by the content
+"""
+
+# Seconds between checks for finished background research requests
+RESEARCH_POLL_SECONDS = 2
+
+# Phrase the LLM uses to introduce content for the document
+EDIT_MARKER = "I'll update the document with:"
+
+# Number of most recent chat messages rendered, and how many older messages
+# each "Show older messages" click adds
+CHAT_HISTORY_WINDOW = 30
+CHAT_HISTORY_PAGE = 20
+
+# Maximum number of messages kept in the displayed chat history; the oldest
+# are dropped once it is full
+CHAT_HISTORY_MAX = 200
+
+# Replies to bare greetings and thanks, answered without calling the LLM
+CANNED_RESPONSES = {
+    "hi": "Hello! How can I help you with your document?",
+    "hello": "Hello! How can I help you with your document?",
+    "hey": "Hello! How can I help you with your document?",
+    "thanks": "You're welcome! Let me know if there's anything else I can help with.",
+    "thank you": "You're welcome! Let me know if there's anything else I can help with.",
+}
+_CANNED_MAX_LENGTH = max(len(key) for key in CANNED_RESPONSES)
+
+# Phrases that suggest the user wants in-depth research rather than a quick search
+RESEARCH_INDICATORS = [
+    "research",
+    "in-depth",
+    "comprehensive",
+    "detailed analysis",
+    "thorough investigation",
+    "deep dive",
+    "academic",
+    "scholarly",
+    "literature review",
+    "systematic review",
+    "meta-analysis",
+    "citations",
+    "references",
+    "bibliography",
+    "peer-reviewed",
+    "journal",
+    "publication"
+]
+
+# All indicators compiled into one case-insensitive alternation. Like the
+# plain substring checks it replaces, it also matches inside longer words.
+_RESEARCH_INDICATOR_PATTERN = re.compile(
+    "|".join(re.escape(indicator) for indicator in RESEARCH_INDICATORS),
+    re.IGNORECASE
+)
+
+# System prompt used when the user is working on an existing document. The
+# instructions come first and the document last, so every request starts
+# with the same prefix and the provider's automatic prompt caching can
+# reuse it across turns.
+SYSTEM_PROMPT_WITH_DOCUMENT = """
+You are a helpful AI assistant that helps the user work with documents.
+
+For document editing:
+- When asked to edit, summarize or add to the document, provide the exact text to be added or modified
+- Begin your response with "I'll update the document with:" followed by the content
+- Use markdown formatting as appropriate
+
+For general questions:
+- Answer clearly and concisely
+- If relevant to the document, reference specific sections
+- For information that might be outdated in your training data, use the available functions
+
+For current events or information retrieval:
+- For general information or current events, use the search_with_perplexity function
+- For in-depth research questions, use the research_with_perplexity function
+
+The current document content is:
+```
+{document}
+```
+"""
+
+# System prompt used while the document is still empty
+SYSTEM_PROMPT_NEW_DOCUMENT = """
+You are a helpful AI assistant. The user is working on a new document.
+
+When the user asks you to create or draft content:
+- Generate appropriate markdown content based on their request
+- Begin your response with "I'll update the document with:" followed by the content
+- Use markdown formatting for headings, lists, emphasis, etc.
+
+For general questions:
+- Answer clearly and concisely
+- If asked about creating document structure, suggest markdown formats
+- For information that might be outdated in your training data, use the available functions
+
+For current events or information retrieval:
+- For general information or current events, use the search_with_perplexity function
+- For in-depth research questions, use the research_with_perplexity function
+"""
+
+def _rerun_chat_panel():
+    """
+    Rerun only the chat panel fragment.
+    
+    A click inside the fragment normally triggers a fragment rerun, but
+    Streamlit can fold it into a pending full-app rerun, where a
+    fragment-scoped rerun is not allowed; the whole app is rerun then.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
 
 class ChatInterface:
     """
@@ -49,176 +232,172 @@ class ChatInterface:
     its state between application reruns using session state.
     """
     
-    def __init__(self, on_research_request=None, use_perplexity=False):
+    def __init__(self, on_research_request=None, use_perplexity=False, on_research_complete=None):
         """
         Initialize the chat interface.
         
         Args:
-            on_research_request (callable, optional): Callback for research requests
+            on_research_request (callable, optional): Callback for research requests.
+                May return a Future to run the research in the background
             use_perplexity (bool, optional): Whether Perplexity AI integration is enabled
+            on_research_complete (callable, optional): Callback that turns the result of
+                a background research request into the reply shown in the chat
         """
-        self.llm_manager = LLMManager()
-        self.webhook_manager = WebhookManager(verify_ssl=False)  # Disable SSL verification
         self.on_research_request = on_research_request
+        self.on_research_complete = on_research_complete
         self.use_perplexity = use_perplexity
         
+        # The LLM manager holds this session's conversation history, so it is
+        # kept in session state rather than shared between sessions
+        if "chat_llm_manager" not in st.session_state:
+            st.session_state.chat_llm_manager = LLMManager()
+        self.llm_manager = st.session_state.chat_llm_manager
+        
+        # Inform the LLM about its capabilities once per conversation
+        if not self.llm_manager.get_conversation_history():
+            self._add_capabilities_message()
+        
         # Initialize session state for chat history if not exists
         if "chat_history" not in st.session_state:
-            st.session_state.chat_history = []
+            st.session_state.chat_history = deque(maxlen=CHAT_HISTORY_MAX)
             
             # Add configuration information as the first message
             self._add_config_info_message()
             
-        if "pending_edit" not in st.session_state:
-            st.session_state.pending_edit = None
-            
-        if "edit_confirmed" not in st.session_state:
-            st.session_state.edit_confirmed = False
+        # Initialize the remaining session state on first run
+        for key, default in (
+            ("pending_edit", None),
+            ("edit_confirmed", False),
+            # Number of most recent messages rendered in the chat history
+            ("chat_window", CHAT_HISTORY_WINDOW),
+            # Research requests running in the background, with the chat
+            # message that shows each result
+            ("pending_research", []),
+            # The document the system prompt was last built for, with that prompt
+            ("system_prompt_cache", (None, None)),
+        ):
+            st.session_state.setdefault(key, default)
             
-        # Add system message to inform the LLM about its capabilities
+    def _add_capabilities_message(self):
+        """Add a system message informing the LLM about its capabilities."""
         if self.use_perplexity:
-            self.add_system_message("""
-            You are an AI assistant with two main capabilities:
-            
-            1. Document Editing:
-               When the user asks you to create, format, edit, or modify their document:
-               - Understand what changes they want to make
-               - Generate the appropriate content or modifications
-               - Use the phrase "I'll update the document with:" followed by the content
-            
-            2. Information Retrieval:
-               You have access to two special functions for retrieving information:
-               - search_with_perplexity: Use this to search the internet for general information and current events
-               - research_with_perplexity: Use this for in-depth research with comprehensive citations
-            
-            EXTREMELY IMPORTANT INSTRUCTIONS:
-            
-            When the user asks ANY question about:
-            - News or current events
-            - Recent developments or updates
-            - Facts that might have changed since your training
-            - "What is X" or "Tell me about X" questions
-            - Any topic where up-to-date information would be valuable
-            
-            You MUST use one of your search functions rather than responding from your training data.
-            DO NOT try to answer these questions directly - ALWAYS use the appropriate function.
-            
-            Examples of when to use search_with_perplexity:
-            - "What are today's top headlines?"
-            - "Tell me about recent developments in AI"
-            - "What is the current situation in Ukraine?"
-            - "Who is the current CEO of Apple?"
-            - "What's the weather like in New York today?"
-            
-            Examples of when to use research_with_perplexity:
-            - "I need detailed research on climate change impacts"
-            - "Provide a comprehensive analysis of quantum computing"
-            - "Give me an in-depth literature review on cancer treatments"
-            - "What are the scholarly perspectives on consciousness?"
-            """)
+            self.add_system_message(CAPABILITIES_MESSAGE_WITH_SEARCH)
         else:
-            self.add_system_message("""
-            You are an AI assistant focused on document editing.
-            
-            When the user asks you to create, format, edit, or modify their document:
-            - Understand what changes they want to make
-            - Generate the appropriate content or modifications
-            - Use the phrase "I'll update the document with:" followed by the content
-            """)
+            self.add_system_message(CAPABILITIES_MESSAGE)
     
     def _add_config_info_message(self):
         """Add a message with the current configuration information to the chat history."""
-        # Determine LLM provider and model
-        if use_azure:
-            llm_provider = "Azure OpenAI"
-            llm_model = azure_model
-        else:
-            llm_provider = "OpenAI"
-            llm_model = openai_model
-            
-        # Format the configuration information message
-        config_info = f"""
-        **System Configuration:**
-        - **LLM Provider:** {llm_provider}
-        - **Model:** {llm_model}
-        - **N8N Integration:** {'Enabled' if use_n8n else 'Disabled'}
-        - **Perplexity Integration:** {'Enabled' if use_perplexity else 'Disabled'}
-        """
-        
-        # Add the message to chat history
         st.session_state.chat_history.append({
             "role": "assistant",
-            "content": config_info
+            "content": CONFIG_INFO_MESSAGE
         })
     
     def render(self):
         """Render the chat interface in the Streamlit sidebar."""
         with st.sidebar:
-            # Display chat history
-            st.write("### Chat History")
-            chat_container = st.container(height=400)
+            self._render_chat_panel()
             
-            with chat_container:
-                for i, message in enumerate(st.session_state.chat_history):
-                    role = message["role"]
-                    content = message["content"]
-                    
-                    if role == "user":
-                        st.markdown(f"**You:** {content}")
-                    elif role == "assistant":
-                        st.markdown(f"**Assistant:** {content}")
-                        
-                        # Check if this is an edit suggestion
-                        if "I'll update the document with:" in content:
-                            # Only show edit confirmation if not already confirmed
-                            if not st.session_state.edit_confirmed:
-                                # Extract the content after the marker
-                                marker = "I'll update the document with:"
-                                marker_index = content.find(marker)
-                                if marker_index != -1:
-                                    edit_content = content[marker_index + len(marker):].strip()
-                                    st.session_state.pending_edit = edit_content
-                                    # Pass the message index to create unique keys
-                                    self._render_edit_confirmation_buttons(message_index=i)
-            
-            # User input area
-            st.write("### Your Message")
+            # Check on background research while any is running
+            if st.session_state.pending_research:
+                self._poll_research()
+    
+    @st.fragment
+    def _render_chat_panel(self):
+        """
+        Render the chat history and the message input.
+        
+        Runs as a fragment, so sending a message or clearing the chat reruns
+        only the sidebar rather than the whole app. Actions that change the
+        document still rerun the full app.
+        """
+        # Display chat history
+        st.write("### Chat History")
+        chat_container = st.container(height=400)
+        # Kept so responses can be streamed into the history while they are generated
+        self.chat_container = chat_container
+        
+        with chat_container:
+            chat_history = st.session_state.chat_history
             
-            # Initialize the widget key counter if it doesn't exist
-            if "widget_key_counter" not in st.session_state:
-                st.session_state.widget_key_counter = 0
-                
-            # Generate a key for the text area that changes when we want to clear it
-            textarea_key = f"user_input_{st.session_state.widget_key_counter}"
+            # Only the most recent messages are rendered; older ones are
+            # shown a page at a time on request
+            hidden = max(len(chat_history) - st.session_state.chat_window, 0)
+            if hidden:
+                st.button(
+                    f"Show older messages ({hidden} hidden)",
+                    key="show_older_messages",
+                    on_click=self._show_older_messages
+                )
             
-            # Text input widget with the dynamic key
-            user_input = st.text_area(
-                "Type your message", 
-                key=textarea_key,
-                height=100
-            )
+            for message in islice(chat_history, hidden, None):
+                # System notices are kept in the history but not shown
+                if message["role"] in ("user", "assistant"):
+                    with st.chat_message(message["role"]):
+                        st.markdown(message["content"])
             
-            # Button row
-            col1, col2 = st.columns(2)
+            # Edits can only be pending on the most recent message, which
+            # is flagged when its response contains an edit suggestion
+            if (
+                chat_history
+                and chat_history[-1].get("has_edit")
+                and st.session_state.pending_edit is not None
+                and not st.session_state.edit_confirmed
+            ):
+                # Pass the message index to create unique keys
+                self._render_edit_confirmation_buttons(message_index=len(chat_history) - 1)
+        
+        # User input area. The chat input clears itself after each message.
+        st.write("### Your Message")
+        user_input = st.chat_input("Type your message")
+        
+        if st.button("🧹 Clear Chat", use_container_width=True):
+            self.clear_chat_history()
+            _rerun_chat_panel()
+        
+        if user_input and user_input.strip():
+            # Process the user input
+            self.process_user_input(user_input)
             
-            with col2:
-                if st.button("🧹 Clear Chat", use_container_width=True):
-                    self.clear_chat_history()
-                    # Re-add the configuration message after clearing
-                    self._add_config_info_message()
-                    st.rerun()
+            # Rerun to show the edit buttons for the new reply. Research
+            # started in the background needs the full app, which polls for
+            # its result outside this fragment.
+            if st.session_state.pending_research:
+                st.rerun()
+            else:
+                _rerun_chat_panel()
+    
+    @st.fragment(run_every=RESEARCH_POLL_SECONDS)
+    def _poll_research(self):
+        """
+        Show the results of background research requests that have finished.
+        
+        Runs as a fragment on a timer, so waiting for research only reruns
+        this check rather than the whole app. Once a request finishes, its
+        result is passed to on_research_complete (which may update the
+        document) and the app is rerun to show the reply.
+        """
+        pending = st.session_state.pending_research
+        finished = [job for job in pending if job["future"].done()]
+        if not finished:
+            return
+        
+        for job in finished:
+            pending.remove(job)
+            try:
+                result = job["future"].result()
+            except Exception as e:
+                job["message"]["content"] = f"Error during research: {str(e)}"
+                continue
             
-            # Send button
-            if st.button("Send", use_container_width=True, type="primary"):
-                if user_input and user_input.strip():
-                    # Process the user input
-                    self.process_user_input(user_input)
-                    
-                    # Increment the counter to change the text area's key on next render
-                    st.session_state.widget_key_counter += 1
-                    
-                    # Force a rerun to update the UI with the new key
-                    st.rerun()
+            if self.on_research_complete:
+                result = self.on_research_complete(result)
+            job["message"]["content"] = result
+        
+        st.rerun()
+    
+    def _show_older_messages(self):
+        """Extend the rendered chat history by another page of older messages."""
+        st.session_state.chat_window += CHAT_HISTORY_PAGE
     
     def _render_edit_confirmation_buttons(self, message_index=0):
         """
@@ -257,7 +436,7 @@ class ChatInterface:
                 
                 # Clear the pending edit
                 st.session_state.pending_edit = None
-                st.rerun()
+                _rerun_chat_panel()
     
     def _get_current_document(self):
         """
@@ -270,18 +449,50 @@ class ChatInterface:
             return st.session_state.markdown_content
         return ""
     
+    def _get_system_prompt(self, current_document):
+        """
+        Get the system prompt for a request about the current document.
+        
+        The prompt embeds the whole document, so it is only rebuilt when the
+        document changes. Session state keeps the same string object while
+        the document is untouched, which makes the check an identity
+        comparison rather than a comparison of the document text.
+        
+        Args:
+            current_document (str): The current document content
+            
+        Returns:
+            str: The system prompt for the request
+        """
+        if not current_document:
+            return SYSTEM_PROMPT_NEW_DOCUMENT
+        
+        cached_document, cached_prompt = st.session_state.system_prompt_cache
+        if current_document is not cached_document:
+            cached_prompt = SYSTEM_PROMPT_WITH_DOCUMENT.format(document=current_document)
+            st.session_state.system_prompt_cache = (current_document, cached_prompt)
+        return cached_prompt
+    
     def clear_chat_history(self):
         """
         Clear the chat history but keep system configuration information.
         
-        This method resets the conversation history but preserves the
-        system configuration information message at the start of the chat.
+        This method resets the conversation history, then adds the
+        capabilities message for the LLM and the configuration information
+        message at the start of the chat again.
         """
         # Clear the session state chat history
-        st.session_state.chat_history = []
+        st.session_state.chat_history = deque(maxlen=CHAT_HISTORY_MAX)
+        st.session_state.chat_window = CHAT_HISTORY_WINDOW
+        st.session_state.pending_research = []
         
         # Clear the LLM manager conversation history
         self.llm_manager.clear_conversation_history()
+        
+        # Start the new conversation the way a new session does. A fragment
+        # rerun doesn't run __init__ again, so both messages are added here.
+        self._add_capabilities_message()
+        self._add_config_info_message()
     
     def add_system_message(self, content):
         """
@@ -292,6 +503,21 @@ class ChatInterface:
         """
         self.llm_manager.add_message("system", content)
     
+    def _get_canned_response(self, user_input):
+        """
+        Get the fixed reply for a bare greeting or thanks.
+        
+        Args:
+            user_input (str): The user's input message
+            
+        Returns:
+            str or None: The reply, or None if the input needs the LLM
+        """
+        key = user_input.strip().rstrip("!. ")
+        if len(key) > _CANNED_MAX_LENGTH:
+            return None
+        return CANNED_RESPONSES.get(key.lower())
+    
     def _should_use_research_mode(self, user_input: str) -> bool:
         """
         Determine if research mode should be used for the given input.
@@ -309,34 +535,12 @@ class ChatInterface:
         # With function calling, we let the LLM decide when to use search vs research
         # But we can still force research mode for certain queries
         
-        research_indicators = [
-            "research",
-            "in-depth",
-            "comprehensive",
-            "detailed analysis",
-            "thorough investigation",
-            "deep dive",
-            "academic",
-            "scholarly",
-            "literature review",
-            "systematic review",
-            "meta-analysis",
-            "citations",
-            "references",
-            "bibliography",
-            "peer-reviewed",
-            "journal",
-            "publication"
-        ]
-        
-        # Convert input to lowercase for case-insensitive matching
-        lower_input = user_input.lower()
-        
-        # Check for research indicators that suggest deep research
-        for indicator in research_indicators:
-            if indicator in lower_input:
-                print(f"Enabling research mode due to indicator: {indicator}")
-                return True
+        # Check for research indicators that suggest deep research, in a
+        # single case-insensitive pass over the input
+        match = _RESEARCH_INDICATOR_PATTERN.search(user_input)
+        if match:
+            print(f"Enabling research mode due to indicator: {match.group(0).lower()}")
+            return True
                 
         return False
         
@@ -368,31 +572,57 @@ class ChatInterface:
                     "content": f"Research: {research_query}"
                 })
                 
-                # Add temporary assistant message
-                temp_idx = len(st.session_state.chat_history)
-                st.session_state.chat_history.append({
+                # Add temporary assistant message. It is updated through this
+                # reference, since its index shifts once the history is full.
+                temp_message = {
                     "role": "assistant",
                     "content": "Researching... please wait."
-                })
+                }
+                st.session_state.chat_history.append(temp_message)
                 
                 try:
                     # Call the research handler with the query
                     result = self.on_research_request(research_query)
                     
-                    # Update the temporary message with the result
-                    st.session_state.chat_history[temp_idx]["content"] = result
+                    if isinstance(result, Future):
+                        # A repeated request may get the research that is
+                        # already running. Its result is applied only once.
+                        if any(job["future"] is result for job in st.session_state.pending_research):
+                            temp_message["content"] = "This research is already in progress. The results will be added to your document once it finishes."
+                        else:
+                            # The research runs in the background; the message
+                            # is updated by _poll_research once it finishes
+                            st.session_state.pending_research.append({
+                                "future": result,
+                                "message": temp_message
+                            })
+                    else:
+                        # Update the temporary message with the result
+                        temp_message["content"] = result
                 except Exception as e:
                     # Update temporary message with error
-                    st.session_state.chat_history[temp_idx]["content"] = f"Error during research: {str(e)}"
+                    temp_message["content"] = f"Error during research: {str(e)}"
                 
                 return
         
         # Add user message to chat history
-        st.session_state.chat_history.append({
+        chat_history = st.session_state.chat_history
+        chat_history.append({
             "role": "user",
             "content": user_input
         })
         
+        # Greetings and thanks get a fixed reply without an API round trip.
+        # The exchange is still added to the LLM history to keep it complete.
+        if canned_response := self._get_canned_response(user_input):
+            chat_history.append({
+                "role": "assistant",
+                "content": canned_response
+            })
+            self.llm_manager.add_message("user", user_input)
+            self.llm_manager.add_message("assistant", canned_response)
+            return
+        
         # Determine if we should use research mode based on the query
         research_mode = False
         if self.use_perplexity:
@@ -402,105 +632,49 @@ class ChatInterface:
         current_document = self._get_current_document()
         
         # Set up system prompt with document context if available
-        if current_document:
-            system_prompt = f"""
-            You are a helpful AI assistant that helps the user work with documents.
-            
-            The current document content is:
-            ```
-            {current_document}
-            ```
-            
-            For document editing:
-            - When asked to edit, summarize or add to the document, provide the exact text to be added or modified
-            - Begin your response with "I'll update the document with:" followed by the content
-            - Use markdown formatting as appropriate
-            
-            For general questions:
-            - Answer clearly and concisely
-            - If relevant to the document, reference specific sections
-            - For information that might be outdated in your training data, use the available functions
-            
-            For current events or information retrieval:
-            - For general information or current events, use the search_with_perplexity function
-            - For in-depth research questions, use the research_with_perplexity function
-            """
-        else:
-            system_prompt = """
-            You are a helpful AI assistant. The user is working on a new document.
+        system_prompt = self._get_system_prompt(current_document)
             
-            When the user asks you to create or draft content:
-            - Generate appropriate markdown content based on their request
-            - Begin your response with "I'll update the document with:" followed by the content
-            - Use markdown formatting for headings, lists, emphasis, etc.
-            
-            For general questions:
-            - Answer clearly and concisely
-            - If asked about creating document structure, suggest markdown formats
-            - For information that might be outdated in your training data, use the available functions
-            
-            For current events or information retrieval:
-            - For general information or current events, use the search_with_perplexity function
-            - For in-depth research questions, use the research_with_perplexity function
-            """
-            
-        # Add temporary assistant message
-        temp_idx = len(st.session_state.chat_history)
-        st.session_state.chat_history.append({
+        # Add temporary assistant message, updated through this reference
+        temp_message = {
             "role": "assistant",
             "content": "Thinking..."
-        })
+        }
+        chat_history.append(temp_message)
+        
+        # Show the new exchange at the bottom of the chat history, so the
+        # answer can be displayed while it is being generated
+        with self.chat_container:
+            with st.chat_message("user"):
+                st.markdown(user_input)
+            with st.chat_message("assistant"):
+                response_placeholder = st.empty()
+        response_placeholder.markdown("Thinking...")
         
-        # Generate LLM response with the appropriate system prompt
+        # Generate LLM response with the appropriate system prompt. API errors
+        # are returned as the response text, so nothing is caught here: a
+        # rerun requested while the answer streams must reach Streamlit.
+        response_text = ""
         try:
-            # Pass research_mode when Perplexity is enabled
-            if self.use_perplexity:
-                response = self.llm_manager.generate_response(
-                    prompt=user_input,
-                    system_prompt=system_prompt,
-                    research_mode=research_mode
-                )
-                # For compatibility with older code
-                if isinstance(response, dict):
-                    response_text = response.get("content", "")
-                else:
-                    response_text = response
-            else:
-                # Regular response without Perplexity
-                response = self.llm_manager.generate_response(
-                    prompt=user_input,
-                    system_prompt=system_prompt
-                )
-                # For compatibility with older code
-                if isinstance(response, dict):
-                    response_text = response.get("content", "")
-                else:
-                    response_text = response
-                
-            # Check if this is a document edit request
-            if response_text.startswith("I'll update the document with:"):
-                # Extract the content after the prefix
-                content_start = response_text.find("I'll update the document with:")
-                if content_start >= 0:
-                    content_start += len("I'll update the document with:")
-                    new_content = response_text[content_start:].strip()
-                    
-                    # Store the edit suggestion in session state
-                    st.session_state.pending_edit = new_content
-                    
-                    # Add the full response with our custom edit buttons
-                    st.session_state.chat_history[temp_idx]["content"] = response_text
-                    st.session_state.chat_history[temp_idx]["has_edit"] = True
-                    
-                    # The callback will handle the rerun
-                    return
-                    
-            # Update the temporary message with the final response
-            st.session_state.chat_history[temp_idx]["content"] = response_text
+            # research_mode is only ever set when Perplexity is enabled
+            for delta in self.llm_manager.generate_response_stream(
+                prompt=user_input,
+                system_prompt=system_prompt,
+                research_mode=research_mode
+            ):
+                response_text += delta
+                response_placeholder.markdown(response_text)
+        finally:
+            # Keep the text received so far if the run is stopped early
+            temp_message["content"] = response_text or "Response stopped before any text was received."
+            
+        # Check if this is a document edit request, with a single search
+        # for the marker
+        marker_index = response_text.find(EDIT_MARKER)
+        if marker_index != -1:
+            # Store the content after the marker as the edit suggestion
+            st.session_state.pending_edit = response_text[marker_index + len(EDIT_MARKER):].strip()
             
-        except Exception as e:
-            # Update the temporary message with error information
-            st.session_state.chat_history[temp_idx]["content"] = f"Error generating response: {str(e)}"
-            print(f"Error in process_user_input: {e}")
+            # Flag the message so the edit buttons are shown with it
+            temp_message["has_edit"] = True
         
         # We don't need to rerun here as the callback function will handle it 
\ No newline at end of file
@@ -21,18 +21,20 @@ License: MIT
 import os
 import sys
 import time
+import hashlib
+import threading
 import streamlit as st
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 from components.chat import ChatInterface
 from components.canvas import MarkdownCanvas
 from utils.webhook_utils import WebhookManager
+from utils.config import get_config
 
-# Load environment variables
-load_dotenv()
-
-# Check if features are enabled
-use_n8n = os.getenv("USE_N8N", "false").lower() == "true"
-use_perplexity = os.getenv("USE_PERPLEXITY", "false").lower() == "true"
+# Check if features are enabled. The settings are loaded once per process,
+# not on every rerun of this script.
+config = get_config()
+use_n8n = config.use_n8n
+use_perplexity = config.use_perplexity
 
 # Set page configuration
 st.set_page_config(
@@ -45,7 +47,12 @@ st.set_page_config(
 # Global flag to track if shutdown is in progress
 shutdown_in_progress = False
 
-# Custom CSS
+# System notice telling the LLM that the document changed
+DOCUMENT_UPDATED_MESSAGE = "The document has been updated. You can access the current content when needed."
+
+# Custom CSS, including the footer styles, injected as a single element.
+# Streamlit removes elements that a rerun doesn't render again, so the
+# block is emitted on every run rather than once per session.
 st.markdown("""
 <style>
     /* Basic layout adjustments */
@@ -82,30 +89,102 @@ st.markdown("""
     .shutdown-btn:hover {
         opacity: 1;
     }
+    
+    /* Compact exit button in the footer column */
+    div[data-testid="column"]:nth-of-type(2) .stButton {
+        text-align: right;
+        height: 1.5rem;
+    }
+    div[data-testid="column"]:nth-of-type(2) .stButton button {
+        font-size: 0.7rem;
+        padding: 0px 0.5rem;
+        line-height: 1.2;
+        min-height: 0px;
+        height: 1.5rem;
+        border-radius: 4px;
+        opacity: 0.6;
+    }
+    div[data-testid="column"]:nth-of-type(2) .stButton button:hover {
+        opacity: 1;
+    }
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def _get_research_executor():
+    """
+    Create the thread pool that runs research webhooks in the background.
+    
+    The pool is shared by all sessions, so a slow webhook never blocks the
+    script thread of the session that started it.
+    """
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="research")
+
+# Research for the same query and document is reused for this long
+RESEARCH_CACHE_TTL_SECONDS = 3600
+RESEARCH_CACHE_MAX_ENTRIES = 64
+
+@st.cache_resource
+def _get_research_cache():
+    """
+    Create the cache of research requests, shared by all sessions.
+    
+    Maps (query, document digest) to (start time, future), so a repeated
+    request reuses the running or finished research instead of calling the
+    webhook again. The lock guards the mapping, since sessions run on
+    separate threads.
+    """
+    return {}, threading.Lock()
+
+@st.cache_resource
+def _get_webhook_manager():
+    """Create the webhook manager once per process and share it across sessions."""
+    # Initialize WebhookManager with SSL verification disabled
+    return WebhookManager(verify_ssl=False)
+
+def _run_research(webhook_manager, query, document_context):
+    """
+    Send a research request to the n8n webhook and process the response.
+    
+    Runs on a research executor thread, so it must not touch session state.
+    
+    Args:
+        webhook_manager (WebhookManager): The webhook manager to send the request with
+        query (str): The research query from the user
+        document_context (str): The document content sent along as context
+        
+    Returns:
+        dict: The processed webhook response
+    """
+    response = webhook_manager.send_research_request(
+        query,
+        additional_context={"document": document_context}
+    )
+    return webhook_manager.process_webhook_response(response)
+
 def handle_research_request(query):
     """
     Handle a research request from the chat interface by sending it to an n8n webhook.
     
-    This function processes research queries from the chat interface, sends them to
-    an n8n webhook for external processing, and integrates the results back into
-    the markdown document. It provides context-aware research capabilities by
-    including the current document content with the request.
+    This function processes research queries from the chat interface and sends
+    them to an n8n webhook for external processing. It provides context-aware
+    research capabilities by including the current document content with the
+    request. The webhook call runs in the background, so the interface stays
+    responsive; the results are integrated into the markdown document by
+    handle_research_result once they arrive.
     
     Args:
         query (str): The research query from the user
         
     Returns:
-        str: A message indicating the result of the research operation
+        Future or str: A future resolving to the processed webhook response,
+            or a message explaining why research could not be started
     """
     # Check if n8n integration is enabled
     if not use_n8n:
         return "Research via n8n is currently disabled. Please enable it by setting USE_N8N=true in your .env file."
     
-    # Initialize WebhookManager with SSL verification disabled
-    webhook_manager = WebhookManager(verify_ssl=False)
+    webhook_manager = _get_webhook_manager()
     
     # Check if webhook URL is configured
     if not webhook_manager.webhook_url:
@@ -117,18 +196,39 @@ def handle_research_request(query):
     else:
         document_context = ""
     
-    # Show status to user
-    with st.sidebar:
-        with st.spinner(f"Researching: {query}"):
-            # Send research request to n8n
-            response = webhook_manager.send_research_request(
-                query,
-                additional_context={"document": document_context}
-            )
-            
-            # Process response
-            processed_response = webhook_manager.process_webhook_response(response)
+    # Reuse research for the same query and document that is still running or
+    # finished successfully
+    research_cache, lock = _get_research_cache()
+    cache_key = (query.strip().lower(), hashlib.blake2b(document_context.encode("utf-8"), digest_size=16).hexdigest())
+    with lock:
+        now = time.monotonic()
+        if cache_key in research_cache:
+            started, future = research_cache[cache_key]
+            failed = future.done() and (future.exception() is not None or not future.result()["success"])
+            if now - started <= RESEARCH_CACHE_TTL_SECONDS and not failed:
+                return future
+        
+        # Drop expired entries, then the oldest ones if the cache is still full
+        for key in [key for key, (started, _) in research_cache.items() if now - started > RESEARCH_CACHE_TTL_SECONDS]:
+            del research_cache[key]
+        while len(research_cache) >= RESEARCH_CACHE_MAX_ENTRIES:
+            del research_cache[min(research_cache, key=lambda key: research_cache[key][0])]
+        
+        # Send research request to n8n in the background
+        future = _get_research_executor().submit(_run_research, webhook_manager, query, document_context)
+        research_cache[cache_key] = (now, future)
+    return future
+
+def handle_research_result(processed_response):
+    """
+    Integrate the results of a finished research request into the document.
     
+    Args:
+        processed_response (dict): The processed webhook response
+        
+    Returns:
+        str: A message indicating the result of the research operation
+    """
     # Handle the response
     if not processed_response["success"]:
         error_message = processed_response.get("error", "Unknown error occurred")
@@ -170,11 +270,14 @@ def handle_content_change(content):
         
         # Only send a notification if the content is not empty and has changed significantly
         if content.strip() and len(content) > 20:
+            # Edits made between two chat turns need only one notice
+            history = chat_interface.llm_manager.get_conversation_history()
+            if history and history[-1]["content"] == DOCUMENT_UPDATED_MESSAGE:
+                return
+            
             # We don't need to send the entire document as a system message anymore
             # since we're providing it just-in-time when needed
-            chat_interface.add_system_message("""
-            The document has been updated. You can access the current content when needed.
-            """)
+            chat_interface.add_system_message(DOCUMENT_UPDATED_MESSAGE)
 
 def graceful_shutdown():
     """
@@ -250,6 +353,7 @@ def main():
     # Initialize components with feature flags
     chat_interface = ChatInterface(
         on_research_request=handle_research_request,
+        on_research_complete=handle_research_result,
         use_perplexity=use_perplexity
     )
     markdown_canvas = MarkdownCanvas(on_content_change=handle_content_change)
@@ -274,30 +378,6 @@ def main():
         st.caption("Travin Canvas - Powered by Streamlit, LangChain, and OpenAI")
     
     with footer_cols[1]:
-        # Apply custom class to the container div
-        st.markdown(
-            """
-            <style>
-            div[data-testid="column"]:nth-of-type(2) .stButton {
-                text-align: right;
-                height: 1.5rem;
-            }
-            div[data-testid="column"]:nth-of-type(2) .stButton button {
-                font-size: 0.7rem;
-                padding: 0px 0.5rem;
-                line-height: 1.2;
-                min-height: 0px;
-                height: 1.5rem;
-                border-radius: 4px;
-                opacity: 0.6;
-            }
-            div[data-testid="column"]:nth-of-type(2) .stButton button:hover {
-                opacity: 1;
-            }
-            </style>
-            """,
-            unsafe_allow_html=True
-        )
         if st.button("⏹️ Exit", key="shutdown_btn", help="Safely shutdown the application", 
                      use_container_width=False, type="secondary", 
                      on_click=graceful_shutdown):
@@ -10,14 +10,24 @@ Key features:
 - Question answering with citations
 - Customizable model parameters
 - Error handling and response formatting
+- Connection reuse across requests through a shared HTTP client
 
 Dependencies:
-- requests: For API communication
+- httpx: For API communication
 """
 
-import requests
+import httpx
 from typing import Optional, Dict, Any
 
+# Connection pool shared by every PerplexityTool, so later questions (and
+# concurrent function calls) reuse open TLS connections instead of
+# handshaking again. Research answers can take minutes, so only the connect
+# phase has a timeout.
+_http_client = httpx.Client(
+    limits=httpx.Limits(max_keepalive_connections=20),
+    timeout=httpx.Timeout(None, connect=10.0)
+)
+
 class PerplexityTool:
     """
     Tool for interacting with Perplexity AI's API.
@@ -98,10 +108,10 @@ class PerplexityTool:
         headers = self._get_headers()
         
         try:
-            response = requests.post(self.base_url, json=payload, headers=headers)
+            response = _http_client.post(self.base_url, json=payload, headers=headers)
             response.raise_for_status()
             return self._format_response(response.json())
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             print(f"Error making request to Perplexity API: {e}")
             return None
             
@@ -7,6 +7,7 @@ core functionality that powers the application's features.
 
 Modules:
 - audio_utils.py: Audio recording, transcription, and speech synthesis
+- config.py: Application settings loaded once from the environment
 - llm_utils.py: LLM interactions, prompt management, and response generation
 - markdown_utils.py: Markdown parsing, formatting, and transformation
 - webhook_utils.py: n8n webhook integration for external workflows
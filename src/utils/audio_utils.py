@@ -19,6 +19,7 @@ Dependencies:
 - pydub: For audio file manipulation
 - wave: For WAV file handling
 - numpy: For audio data processing
+- utils.config: For environment configuration
 """
 
 import os
@@ -32,10 +33,10 @@ from pydub import AudioSegment
 from pydub.playback import play
 import httpx
 from openai import OpenAI
-from dotenv import load_dotenv
+from utils.config import get_config
 
 # Load environment variables
-load_dotenv()
+config = get_config()
 
 # Initialize OpenAI client
 api_key = os.getenv("OPENAI_API_KEY")
@@ -110,8 +111,10 @@ class AudioProcessor:
         
         print("Recording stopped.")
         
-        # Save the recorded audio to a temporary file
+        # Save the recorded audio to a temporary file, closing the handle so
+        # the file can be reopened by name on every platform
         temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+        temp_file.close()
         with wave.open(temp_file.name, 'wb') as wf:
             wf.setnchannels(self.channels)
             wf.setsampwidth(self.audio.get_sample_size(self.format))
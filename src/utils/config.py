@@ -0,0 +1,77 @@
+"""
+Configuration Utilities for Travin Canvas
+
+This module provides access to the application settings read from the
+environment. The .env file is loaded and the settings are parsed once per
+process, so the Streamlit script, which re-executes on every rerun, doesn't
+read the file or parse the flags again.
+
+Key features:
+- Single load of the .env file per process
+- Feature flags parsed once into an immutable settings object
+- Shared by the main script, components, and utilities
+- Upload size limit shared by the launcher and the canvas
+
+Dependencies:
+- dotenv: For environment variable management
+- functools: For caching the parsed settings
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+# Largest Word/PDF upload accepted, in MiB (the unit of Streamlit's
+# server.maxUploadSize). run.py passes it to the server unless the upload size
+# is already configured, and the canvas derives its byte limit from it.
+MAX_UPLOAD_MB = 50
+
+def _env_flag(name):
+    """
+    Read a "true"/"false" feature flag from the environment.
+    
+    Args:
+        name (str): The name of the environment variable
+    
+    Returns:
+        bool: Whether the flag is set to "true" (case-insensitive)
+    """
+    return os.getenv(name, "false").lower() == "true"
+
+@dataclass(frozen=True)
+class AppConfig:
+    """
+    Application settings read from the environment.
+    
+    Attributes:
+        use_azure (bool): Whether to use Azure OpenAI instead of OpenAI
+        use_n8n (bool): Whether n8n webhook research is enabled
+        use_perplexity (bool): Whether Perplexity AI search is enabled
+        azure_model (str): The Azure OpenAI deployment to use
+        openai_model (str): The OpenAI model to use
+    """
+    use_azure: bool
+    use_n8n: bool
+    use_perplexity: bool
+    azure_model: str
+    openai_model: str
+
+@lru_cache(maxsize=1)
+def get_config():
+    """
+    Get the application settings, loading them on first use.
+    
+    Returns:
+        AppConfig: The settings for this process
+    """
+    # Load environment variables
+    load_dotenv()
+    
+    return AppConfig(
+        use_azure=_env_flag("USE_AZURE"),
+        use_n8n=_env_flag("USE_N8N"),
+        use_perplexity=_env_flag("USE_PERPLEXITY"),
+        azure_model=os.getenv("AZURE_MODEL", ""),
+        openai_model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    )
@@ -8,7 +8,8 @@ intelligent conversations in the Travin Canvas application.
 Key features:
 - OpenAI API integration for chat completions with function calling
 - Perplexity AI integration for research and information gathering
-- Conversation history management
+- Conversation history management with a token-budgeted sliding window
+- Response cache for repeated requests
 - Specialized prompt templates for document operations
 - Document summarization and enhancement capabilities
 - Error handling and retry logic
@@ -16,38 +17,43 @@ Key features:
 Dependencies:
 - openai: For API access to OpenAI models
 - httpx: For custom HTTP client configuration
-- dotenv: For environment variable management
+- utils.config: For environment configuration
 - tools.perplexity: For Perplexity AI integration
 """
 
 import os
 import json
+import time
+import hashlib
+import threading
 import httpx
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict, Any
 from openai import OpenAI
 from openai import AzureOpenAI
-from dotenv import load_dotenv
 from tools.perplexity import PerplexityTool
+from utils.config import get_config
 
 # Load environment variables
-load_dotenv()
+config = get_config()
 
 # Initialize Azure configuration if USE_AZURE is True
-use_azure = os.getenv("USE_AZURE", "false").lower() == "true"
+use_azure = config.use_azure
 if use_azure:
     azure_api_key = os.getenv("AZURE_API_KEY")
     azure_api_version = os.getenv("AZURE_OPENAI_API_VERSION") #"2024-12-01-preview"
     azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    azure_model = os.getenv("AZURE_MODEL")
+    azure_model = config.azure_model
 else:
     # Initialize OpenAI configuration
     openai_api_key = os.getenv("OPENAI_API_KEY")
-    openai_model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")  # Default to gpt-3.5-turbo if not specified
+    openai_model = config.openai_model  # Defaults to gpt-3.5-turbo if not specified
     if not openai_api_key:
         raise ValueError("OPENAI_API_KEY environment variable is not set")
 
 # Check if Perplexity integration is enabled
-use_perplexity = os.getenv("USE_PERPLEXITY", "false").lower() == "true"
+use_perplexity = config.use_perplexity
 
 # Initialize Perplexity configuration
 perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
@@ -114,6 +120,80 @@ PERPLEXITY_RESEARCH_FUNCTION = {
     }
 }
 
+# Conversation history sent with each request is kept within this many
+# (estimated) tokens; the oldest messages are dropped and summarized
+HISTORY_TOKEN_BUDGET = 4000
+# Trimming goes down to this many tokens, so the next few turns fit without
+# another trim (and another summary request)
+HISTORY_TRIM_TARGET = 3000
+# The most recent messages (the last two turns) are never dropped
+HISTORY_KEEP_MESSAGES = 4
+# Approximate number of characters per token used to estimate message size
+CHARS_PER_TOKEN = 4
+# Fixed per-message token overhead (role and message framing)
+MESSAGE_TOKEN_OVERHEAD = 4
+# Dropping at least this many messages replaces them with a summary
+SUMMARY_MIN_MESSAGES = 3
+SUMMARY_PREFIX = "Earlier conversation summary:"
+
+# Responses to repeated requests are reused for this long. A request repeats
+# when the model, system prompt (including the document), research mode,
+# prompt and the last RESPONSE_CACHE_HISTORY_TAIL history messages match.
+# Answers that called a tool (web search or research) are never cached.
+RESPONSE_CACHE_TTL_SECONDS = 3600
+RESPONSE_CACHE_MAX_ENTRIES = 512
+RESPONSE_CACHE_HISTORY_TAIL = 3
+
+# Shared by all LLMManager instances; maps request keys to (time, response)
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+def _get_cached_response(key):
+    """
+    Look up a cached response.
+    
+    Args:
+        key (str): The request key
+        
+    Returns:
+        str or None: The cached response, or None if there is no fresh entry
+    """
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > RESPONSE_CACHE_TTL_SECONDS:
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+        return entry[1]
+
+def _cache_response(key, response_text):
+    """
+    Store a response, evicting the least recently used entries when full.
+    
+    Args:
+        key (str): The request key
+        response_text (str): The response to store
+    """
+    with _response_cache_lock:
+        _response_cache[key] = (time.monotonic(), response_text)
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
+
+def _estimate_tokens(content):
+    """
+    Estimate the number of tokens a message takes up in a request.
+    
+    Args:
+        content (str): The content of the message
+        
+    Returns:
+        int: The estimated token count
+    """
+    return len(content or "") // CHARS_PER_TOKEN + MESSAGE_TOKEN_OVERHEAD
+
 class LLMManager:
     """
     Manages interactions with Large Language Models.
@@ -142,6 +222,8 @@ class LLMManager:
         else:
             self.model = model or openai_model
         self.conversation_history = []
+        # Estimated token count of each history message, in the same order
+        self.history_tokens = []
         self.perplexity = None
         # Only initialize Perplexity if the feature is enabled and API key is available
         if use_perplexity and perplexity_api_key:
@@ -161,6 +243,7 @@ class LLMManager:
             content (str): The content of the message
         """
         self.conversation_history.append({"role": role, "content": content})
+        self.history_tokens.append(_estimate_tokens(content))
         
     def get_conversation_history(self):
         """
@@ -174,6 +257,77 @@ class LLMManager:
     def clear_conversation_history(self):
         """Clear the conversation history."""
         self.conversation_history = []
+        self.history_tokens = []
+    
+    def _trim_history(self):
+        """
+        Keep the conversation history within HISTORY_TOKEN_BUDGET.
+        
+        Once the history is over budget, the oldest messages are dropped
+        until it fits within HISTORY_TRIM_TARGET. The first system message
+        (the assistant's capabilities) and the last HISTORY_KEEP_MESSAGES
+        messages are always kept. When enough messages are dropped they are
+        replaced with a single summary message, so later requests keep the
+        gist of the conversation.
+        """
+        total = sum(self.history_tokens)
+        if total <= HISTORY_TOKEN_BUDGET:
+            return
+        
+        history = list(zip(self.conversation_history, self.history_tokens))
+        first = history[0][0]
+        pinned = 1 if first["role"] == "system" and not (first["content"] or "").startswith(SUMMARY_PREFIX) else 0
+        start = len(history) - HISTORY_KEEP_MESSAGES
+        
+        dropped = []
+        index = pinned
+        while index < start and total > HISTORY_TRIM_TARGET:
+            message, tokens = history[index]
+            dropped.append(message)
+            total -= tokens
+            index += 1
+        if not dropped:
+            return
+        
+        kept = history[:pinned] + history[index:]
+        if len(dropped) >= SUMMARY_MIN_MESSAGES:
+            summary = self._summarize_messages(dropped)
+            if summary:
+                content = f"{SUMMARY_PREFIX} {summary}"
+                kept.insert(pinned, ({"role": "system", "content": content}, _estimate_tokens(content)))
+        
+        print(f"Trimmed {len(dropped)} messages from the conversation history")
+        self.conversation_history = [message for message, _ in kept]
+        self.history_tokens = [tokens for _, tokens in kept]
+    
+    def _summarize_messages(self, messages):
+        """
+        Summarize messages that are being dropped from the conversation history.
+        
+        Args:
+            messages (list): The messages to summarize
+            
+        Returns:
+            str or None: The summary, or None if it could not be generated
+        """
+        transcript = "\n\n".join(
+            f"{message['role']}: {message['content']}"
+            for message in messages
+            if message["content"]
+        )
+        
+        try:
+            response = client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "Summarize the following conversation in a few sentences. Keep any facts, decisions and open requests that later messages may refer to."},
+                    {"role": "user", "content": transcript}
+                ]
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"Error summarizing conversation history: {e}")
+            return None
         
     def search_with_perplexity(self, query: str) -> Optional[str]:
         """
@@ -231,7 +385,8 @@ class LLMManager:
         
         This method uses Perplexity AI to gather detailed information and citations
         about a specific topic. It's designed for in-depth research queries that
-        require comprehensive and well-cited responses.
+        require comprehensive and well-cited responses. It is an alias of
+        research_with_perplexity, which uses the research model.
         
         Args:
             query (str): The research query
@@ -239,34 +394,18 @@ class LLMManager:
         Returns:
             str or None: The research results or None if an error occurred
         """
-        # Check if Perplexity is enabled at the application level
-        if not use_perplexity:
-            print("Warning: Perplexity AI integration is disabled (USE_PERPLEXITY is false)")
-            return "Perplexity AI research is currently disabled in this application."
-        
-        if not self.perplexity:
-            print("Warning: Perplexity AI not available - PERPLEXITY_API_KEY not set")
-            return "Perplexity AI research is not available. Please check your API key configuration."
-            
-        try:
-            # Use the research model for more comprehensive results
-            return self.perplexity.ask_question(query, model=self.perplexity_research_model)
-        except Exception as e:
-            print(f"Error researching topic with Perplexity: {e}")
-            return f"Error researching with Perplexity: {str(e)}"
+        return self.research_with_perplexity(query)
             
-    def generate_response(self, prompt=None, system_prompt=None, research_mode=False, is_document_request=False):
+    def _build_messages(self, prompt=None, system_prompt=None):
         """
-        Generate a response from the LLM based on the conversation history.
+        Build the message list for a chat completion.
         
         Args:
-            prompt (str, optional): The user prompt to add to the conversation history
-            system_prompt (str, optional): A system prompt to use for this interaction
-            research_mode (bool, optional): Whether to use Perplexity AI for research
-            is_document_request (bool, optional): Whether this is a document-related request
+            prompt (str, optional): The user prompt to append after the history
+            system_prompt (str, optional): A system prompt to put before the history
             
         Returns:
-            dict: The response from the LLM, including content and any function calls
+            list: The messages to send to the API
         """
         messages = []
         
@@ -274,106 +413,216 @@ class LLMManager:
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
             
-        # Add conversation history
+        # Add conversation history, trimmed to the token budget
+        self._trim_history()
         messages.extend(self.conversation_history)
         
         # Add new prompt if provided
         if prompt:
             messages.append({"role": "user", "content": prompt})
+        
+        return messages
+    
+    def _response_cache_key(self, prompt, system_prompt, research_mode):
+        """
+        Build the response cache key for a request.
+        
+        Args:
+            prompt (str): The user prompt
+            system_prompt (str, optional): The system prompt for this interaction
+            research_mode (bool): Whether Perplexity research is forced
             
-        try:
-            # Check if this is a document editing request
-            if system_prompt and any(phrase in system_prompt for phrase in [
-                "summarize or add the content", 
-                "add to the document", 
-                "update the document"
-            ]):
-                is_document_request = True
-                print("Detected document editing request")
-            
-            # Define available tools based on Perplexity availability
-            tools = None
-            if use_perplexity and self.perplexity and not is_document_request:
-                tools = [PERPLEXITY_SEARCH_FUNCTION, PERPLEXITY_RESEARCH_FUNCTION]
-            
-            # Default to auto tool choice
-            tool_choice = "auto"
-            
-            # Check if the prompt contains keywords that suggest using search
-            if prompt and self.perplexity and tools and not is_document_request:
-                search_keywords = ["news", "latest", "current", "recent", "today", "headlines", "what is", "who is", "where is", "when did", "how to", "tell me about"]
-                lower_prompt = prompt.lower()
-                
-                for keyword in search_keywords:
-                    if keyword in lower_prompt:
-                        # Force the model to use the search function
-                        tool_choice = {
-                            "type": "function",
-                            "function": {"name": "search_with_perplexity"}
-                        }
-                        print(f"Forcing search function for keyword: {keyword}")
-                        break
-            
-            # If research mode is enabled, override and force research function
-            if research_mode and self.perplexity and not is_document_request:
-                tool_choice = {
+        Returns:
+            str: A digest of everything the cached response depends on
+        """
+        key_data = json.dumps([
+            self.model,
+            system_prompt,
+            research_mode,
+            self.conversation_history[-RESPONSE_CACHE_HISTORY_TAIL:],
+            prompt
+        ])
+        return hashlib.blake2b(key_data.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _select_tools(self, prompt=None, system_prompt=None, research_mode=False, is_document_request=False):
+        """
+        Choose the tools offered to the model and how it must use them.
+        
+        Args:
+            prompt (str, optional): The user prompt
+            system_prompt (str, optional): The system prompt for this interaction
+            research_mode (bool, optional): Whether to force Perplexity research
+            is_document_request (bool, optional): Whether this is a document-related request
+            
+        Returns:
+            tuple: (tools, tool_choice), both None when no tools are offered
+        """
+        # Check if this is a document editing request
+        if system_prompt and any(phrase in system_prompt for phrase in [
+            "summarize or add the content", 
+            "add to the document", 
+            "update the document"
+        ]):
+            is_document_request = True
+            print("Detected document editing request")
+        
+        # Define available tools based on Perplexity availability
+        tools = None
+        if use_perplexity and self.perplexity and not is_document_request:
+            tools = [PERPLEXITY_SEARCH_FUNCTION, PERPLEXITY_RESEARCH_FUNCTION]
+        
+        # Default to auto tool choice
+        tool_choice = "auto"
+        
+        # Check if the prompt contains keywords that suggest using search
+        if prompt and self.perplexity and tools and not is_document_request:
+            search_keywords = ["news", "latest", "current", "recent", "today", "headlines", "what is", "who is", "where is", "when did", "how to", "tell me about"]
+            lower_prompt = prompt.lower()
+            
+            for keyword in search_keywords:
+                if keyword in lower_prompt:
+                    # Force the model to use the search function
+                    tool_choice = {
+                        "type": "function",
+                        "function": {"name": "search_with_perplexity"}
+                    }
+                    print(f"Forcing search function for keyword: {keyword}")
+                    break
+        
+        # If research mode is enabled, override and force research function
+        if research_mode and self.perplexity and not is_document_request:
+            tool_choice = {
+                "type": "function",
+                "function": {"name": "research_with_perplexity"}
+            }
+            print("Forcing research function due to research_mode=True")
+        
+        print(f"Using tool_choice: {tool_choice}")
+        
+        if not tools:
+            return None, None
+        return tools, tool_choice
+    
+    def _call_tool(self, tool_call):
+        """
+        Run a single function called by the model.
+        
+        Args:
+            tool_call (dict): The call, with "id", "name" and "arguments" keys
+            
+        Returns:
+            str or None: The function result, or None for an unknown function
+        """
+        function_name = tool_call["name"]
+        function_args = json.loads(tool_call["arguments"])
+        
+        print(f"Executing {function_name} with query: {function_args.get('query')}")
+        
+        # Execute the appropriate function
+        if function_name == "search_with_perplexity":
+            return self.search_with_perplexity(function_args.get("query"))
+        elif function_name == "research_with_perplexity":
+            return self.research_with_perplexity(function_args.get("query"))
+        return None
+    
+    def _execute_tool_calls(self, messages, tool_calls):
+        """
+        Run the functions the model called and append their results to messages.
+        
+        When the model calls several functions in one turn they are run
+        concurrently, so the turn waits for the slowest search rather than
+        the sum of all of them.
+        
+        Args:
+            messages (list): The messages of the current interaction, extended in place
+            tool_calls (list): The calls as dicts with "id", "name" and "arguments" keys
+        """
+        print(f"Model decided to use function: {tool_calls[0]['name']}")
+        
+        if len(tool_calls) > 1:
+            with ThreadPoolExecutor(max_workers=len(tool_calls)) as executor:
+                function_responses = list(executor.map(self._call_tool, tool_calls))
+        else:
+            function_responses = [self._call_tool(tool_calls[0])]
+        
+        # Only calls that produced a result are sent back to the model
+        answered = [
+            (tool_call, function_response)
+            for tool_call, function_response in zip(tool_calls, function_responses)
+            if function_response
+        ]
+        if not answered:
+            return
+        
+        # The assistant turn lists every call, followed by one result per call
+        messages.append({
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": tool_call["id"],
                     "type": "function",
-                    "function": {"name": "research_with_perplexity"}
+                    "function": {
+                        "name": tool_call["name"],
+                        "arguments": tool_call["arguments"]
+                    }
                 }
-                print("Forcing research function due to research_mode=True")
+                for tool_call, _ in answered
+            ]
+        })
+        
+        for tool_call, function_response in answered:
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call["id"],
+                "content": function_response
+            })
+    
+    def generate_response(self, prompt=None, system_prompt=None, research_mode=False, is_document_request=False):
+        """
+        Generate a response from the LLM based on the conversation history.
+        
+        Args:
+            prompt (str, optional): The user prompt to add to the conversation history
+            system_prompt (str, optional): A system prompt to use for this interaction
+            research_mode (bool, optional): Whether to use Perplexity AI for research
+            is_document_request (bool, optional): Whether this is a document-related request
             
-            print(f"Using tool_choice: {tool_choice}")
+        Returns:
+            str: The response text, or an "Error: ..." message if the request failed
+        """
+        messages = self._build_messages(prompt, system_prompt)
+        
+        # Repeated requests are answered from the cache
+        cache_key = self._response_cache_key(prompt, system_prompt, research_mode) if prompt else None
+        if cache_key and (response_text := _get_cached_response(cache_key)) is not None:
+            self.add_message("user", prompt)
+            self.add_message("assistant", response_text)
+            return response_text
+            
+        try:
+            tools, tool_choice = self._select_tools(prompt, system_prompt, research_mode, is_document_request)
             
             # Make the initial API call with function calling enabled
             response = client.chat.completions.create(
                 model=self.model,
                 messages=messages,
-                tools=tools if tools else None,
-                tool_choice=tool_choice if tools else None
+                tools=tools,
+                tool_choice=tool_choice
             )
             
             response_message = response.choices[0].message
             
             # Check if the model wants to call a function
             if response_message.tool_calls:
-                print(f"Model decided to use function: {response_message.tool_calls[0].function.name}")
-                
-                # Process each tool call
-                for tool_call in response_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-                    
-                    print(f"Executing {function_name} with query: {function_args.get('query')}")
-                    
-                    # Execute the appropriate function
-                    function_response = None
-                    if function_name == "search_with_perplexity":
-                        function_response = self.search_with_perplexity(function_args.get("query"))
-                    elif function_name == "research_with_perplexity":
-                        function_response = self.research_with_perplexity(function_args.get("query"))
-                    
-                    # Add the function response to messages
-                    if function_response:
-                        messages.append({
-                            "role": "assistant",
-                            "content": None,
-                            "tool_calls": [
-                                {
-                                    "id": tool_call.id,
-                                    "type": "function",
-                                    "function": {
-                                        "name": function_name,
-                                        "arguments": tool_call.function.arguments
-                                    }
-                                }
-                            ]
-                        })
-                        
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": function_response
-                        })
+                self._execute_tool_calls(messages, [
+                    {
+                        "id": tool_call.id,
+                        "name": tool_call.function.name,
+                        "arguments": tool_call.function.arguments
+                    }
+                    for tool_call in response_message.tool_calls
+                ])
                 
                 # Make a second API call to get the final response
                 second_response = client.chat.completions.create(
@@ -386,20 +635,112 @@ class LLMManager:
                 print("Model did not use any functions")
                 # If no function was called, use the original response
                 response_text = response_message.content
+                
+                # Only answers that didn't use a tool are cached; search
+                # results go stale and must not be shared between sessions
+                if cache_key and response_text:
+                    _cache_response(cache_key, response_text)
             
             # Add the new messages to the conversation history
             if prompt:
                 self.add_message("user", prompt)
             self.add_message("assistant", response_text)
             
-            return {
-                "content": response_text,
-                "function_calls": response_message.tool_calls
-            }
+            return response_text
         except Exception as e:
             print(f"Error generating LLM response: Use Azure={use_azure}|Model={self.model}|Error={e}")
             return f"Error: {str(e)}"
     
+    def generate_response_stream(self, prompt=None, system_prompt=None, research_mode=False, is_document_request=False):
+        """
+        Generate a response from the LLM, yielding the text as it is produced.
+        
+        Works like generate_response, but the completion is streamed so the
+        caller can display the answer while it is still being generated. When
+        the model calls a function, the function runs once its arguments have
+        been received and the final answer is streamed from a second call.
+        The complete exchange is added to the conversation history at the end.
+        
+        Args:
+            prompt (str, optional): The user prompt to add to the conversation history
+            system_prompt (str, optional): A system prompt to use for this interaction
+            research_mode (bool, optional): Whether to use Perplexity AI for research
+            is_document_request (bool, optional): Whether this is a document-related request
+            
+        Yields:
+            str: Successive pieces of the response text
+        """
+        messages = self._build_messages(prompt, system_prompt)
+        response_parts = []
+        
+        # Repeated requests are answered from the cache. As with a generated
+        # answer, the exchange is added to the history only after it has been
+        # consumed, so a run stopped at the yield leaves the history unchanged.
+        cache_key = self._response_cache_key(prompt, system_prompt, research_mode) if prompt else None
+        if cache_key and (response_text := _get_cached_response(cache_key)) is not None:
+            yield response_text
+            self.add_message("user", prompt)
+            self.add_message("assistant", response_text)
+            return
+        
+        try:
+            tools, tool_choice = self._select_tools(prompt, system_prompt, research_mode, is_document_request)
+            
+            stream = client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                stream=True
+            )
+            
+            # Text is passed through as it arrives; function calls arrive in
+            # fragments and are assembled by their index
+            tool_calls = {}
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    response_parts.append(delta.content)
+                    yield delta.content
+                for tool_call_delta in delta.tool_calls or ():
+                    tool_call = tool_calls.setdefault(tool_call_delta.index, {"id": None, "name": "", "arguments": ""})
+                    if tool_call_delta.id:
+                        tool_call["id"] = tool_call_delta.id
+                    if tool_call_delta.function:
+                        tool_call["name"] += tool_call_delta.function.name or ""
+                        tool_call["arguments"] += tool_call_delta.function.arguments or ""
+            
+            if tool_calls:
+                self._execute_tool_calls(messages, [tool_calls[index] for index in sorted(tool_calls)])
+                
+                # Stream the final response based on the function results
+                second_stream = client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    stream=True
+                )
+                for chunk in second_stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        response_parts.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            else:
+                print("Model did not use any functions")
+            
+            response_text = "".join(response_parts)
+            # Only answers that didn't use a tool are cached
+            if cache_key and response_text and not tool_calls:
+                _cache_response(cache_key, response_text)
+            
+            # Add the new messages to the conversation history
+            if prompt:
+                self.add_message("user", prompt)
+            self.add_message("assistant", response_text)
+        except Exception as e:
+            print(f"Error generating LLM response: Use Azure={use_azure}|Model={self.model}|Error={e}")
+            yield f"Error: {str(e)}"
+    
     def generate_markdown_summary(self, markdown_text):
         """
         Generate a summary of markdown content.
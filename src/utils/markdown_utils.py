@@ -15,11 +15,80 @@ Key features:
 Dependencies:
 - langchain_text_splitters: For semantic document splitting
 - re: For regular expression pattern matching
+- functools: For memoizing table of contents and formatting results
+- cmarkgfm: For fast GitHub-flavored markdown to HTML rendering (C library)
+- markdown_it: Pure-Python rendering fallback when cmarkgfm is unavailable
 """
 
 import re
+from functools import lru_cache
 from langchain_text_splitters import MarkdownHeaderTextSplitter
 
+try:
+    import cmarkgfm
+    from cmarkgfm.cmark import Options as cmarkgfmOptions
+except ImportError:
+    cmarkgfm = None
+    from markdown_it import MarkdownIt
+
+def _extract_headers(markdown_text):
+    """Return the headers of markdown text as a list of level/text dicts."""
+    header_pattern = r'^(#{1,6})\s+(.+)$'
+    headers = []
+    
+    for line in markdown_text.split('\n'):
+        match = re.match(header_pattern, line)
+        if match:
+            level = len(match.group(1))
+            text = match.group(2).strip()
+            headers.append({
+                "level": level,
+                "text": text
+            })
+            
+    return headers
+
+@lru_cache(maxsize=8)
+def _generate_table_of_contents(markdown_text):
+    """Build the table of contents for markdown text (memoized per text)."""
+    headers = _extract_headers(markdown_text)
+    if not headers:
+        return ""
+        
+    toc = ["# Table of Contents\n"]
+    
+    for header in headers:
+        # Skip the title (H1) if it's the first header
+        if header["level"] == 1 and headers.index(header) == 0:
+            continue
+            
+        indent = "  " * (header["level"] - 1)
+        link_text = header["text"]
+        link_target = header["text"].lower().replace(" ", "-")
+        toc.append(f"{indent}- [{link_text}](#{link_target})")
+        
+    return "\n".join(toc)
+
+@lru_cache(maxsize=8)
+def _format_markdown(markdown_text):
+    """Normalize newlines and spacing of markdown text (memoized per text)."""
+    # Ensure consistent newlines
+    formatted_text = markdown_text.replace('\r\n', '\n')
+    
+    # Ensure headers have space after #
+    header_pattern = r'^(#{1,6})([^ #])'
+    formatted_text = re.sub(header_pattern, r'\1 \2', formatted_text, flags=re.MULTILINE)
+    
+    # Ensure lists have space after bullet
+    list_pattern = r'^(\s*[-*+])([^ ])'
+    formatted_text = re.sub(list_pattern, r'\1 \2', formatted_text, flags=re.MULTILINE)
+    
+    # Ensure consistent spacing between sections
+    section_pattern = r'(\n#{1,6} .+\n)([^\n])'
+    formatted_text = re.sub(section_pattern, r'\1\n\2', formatted_text)
+    
+    return formatted_text
+
 class MarkdownProcessor:
     """
     Processes and manipulates markdown content.
@@ -49,6 +118,32 @@ class MarkdownProcessor:
                 ("######", "Header 6"),
             ]
         )
+        
+        # Only needed when the C renderer isn't installed
+        if cmarkgfm is None:
+            self.html_renderer = MarkdownIt("commonmark", {"html": True}).enable(["table", "strikethrough"])
+    
+    def render_html(self, markdown_text):
+        """
+        Render markdown text to HTML.
+        
+        Uses the cmark-gfm C library when available, which is several times
+        faster than a pure-Python parser on large documents, and falls back
+        to markdown-it otherwise.
+        
+        Args:
+            markdown_text (str): The markdown text to render
+            
+        Returns:
+            str: The rendered HTML
+        """
+        if cmarkgfm is not None:
+            # Raw HTML is passed through; st.html sanitizes it on the frontend
+            return cmarkgfm.github_flavored_markdown_to_html(
+                markdown_text,
+                options=cmarkgfmOptions.CMARK_OPT_UNSAFE
+            )
+        return self.html_renderer.render(markdown_text)
     
     def split_by_headers(self, markdown_text):
         """
@@ -79,75 +174,38 @@ class MarkdownProcessor:
         Returns:
             list: A list of headers with their levels and text
         """
-        header_pattern = r'^(#{1,6})\s+(.+)$'
-        headers = []
-        
-        for line in markdown_text.split('\n'):
-            match = re.match(header_pattern, line)
-            if match:
-                level = len(match.group(1))
-                text = match.group(2).strip()
-                headers.append({
-                    "level": level,
-                    "text": text
-                })
-                
-        return headers
+        return _extract_headers(markdown_text)
     
     def generate_table_of_contents(self, markdown_text):
         """
         Generate a table of contents from markdown text.
         
+        Results are memoized per document text, so repeated calls on
+        unchanged content return without reparsing it.
+        
         Args:
             markdown_text (str): The markdown text to process
             
         Returns:
             str: A markdown-formatted table of contents
         """
-        headers = self.extract_headers(markdown_text)
-        if not headers:
-            return ""
-            
-        toc = ["# Table of Contents\n"]
-        
-        for header in headers:
-            # Skip the title (H1) if it's the first header
-            if header["level"] == 1 and headers.index(header) == 0:
-                continue
-                
-            indent = "  " * (header["level"] - 1)
-            link_text = header["text"]
-            link_target = header["text"].lower().replace(" ", "-")
-            toc.append(f"{indent}- [{link_text}](#{link_target})")
-            
-        return "\n".join(toc)
+        return _generate_table_of_contents(markdown_text)
     
     def format_markdown(self, markdown_text):
         """
         Format markdown text for consistent styling.
         
+        Results are memoized per document text, so formatting an unchanged
+        (or already formatted) document returns without rerunning the
+        substitutions.
+        
         Args:
             markdown_text (str): The markdown text to format
             
         Returns:
             str: The formatted markdown text
         """
-        # Ensure consistent newlines
-        formatted_text = markdown_text.replace('\r\n', '\n')
-        
-        # Ensure headers have space after #
-        header_pattern = r'^(#{1,6})([^ #])'
-        formatted_text = re.sub(header_pattern, r'\1 \2', formatted_text, flags=re.MULTILINE)
-        
-        # Ensure lists have space after bullet
-        list_pattern = r'^(\s*[-*+])([^ ])'
-        formatted_text = re.sub(list_pattern, r'\1 \2', formatted_text, flags=re.MULTILINE)
-        
-        # Ensure consistent spacing between sections
-        section_pattern = r'(\n#{1,6} .+\n)([^\n])'
-        formatted_text = re.sub(section_pattern, r'\1\n\2', formatted_text)
-        
-        return formatted_text
+        return _format_markdown(markdown_text)
     
     def extract_code_blocks(self, markdown_text):
         """
@@ -11,23 +11,21 @@ Key features:
 - Prompt enhancement for dynamic LLM interactions
 - Response processing and error handling
 - Context-aware request formatting
+- Connection reuse across requests through a persistent HTTP session
 
 Dependencies:
 - requests: For HTTP communication with webhooks
 - json: For data serialization and deserialization
-- dotenv: For environment variable management
+- utils.config: For environment configuration
 """
 
 import os
 import json
 import requests
-from dotenv import load_dotenv
+from utils.config import get_config
 
-# Load environment variables
-load_dotenv()
-
-# Check if n8n integration is enabled
-use_n8n = os.getenv("USE_N8N", "false").lower() == "true"
+# Check if n8n integration is enabled (this also loads the environment variables)
+use_n8n = get_config().use_n8n
 
 class WebhookManager:
     """
@@ -45,12 +43,14 @@ class WebhookManager:
     beyond its local capabilities by leveraging external workflows and services.
     """
     
-    def __init__(self, verify_ssl=False):
+    def __init__(self, verify_ssl=False, session=None):
         """
         Initialize the webhook manager with the webhook URL from environment variables.
         
         Args:
             verify_ssl (bool): Whether to verify SSL certificates. Set to False to bypass SSL verification.
+            session (requests.Session, optional): The HTTP session to send requests with.
+                A new session is created if not provided.
         """
         # First check if n8n integration is enabled
         self.is_enabled = use_n8n
@@ -64,6 +64,10 @@ class WebhookManager:
         self.webhook_url = webhook_url
         self.verify_ssl = verify_ssl
         
+        # Requests share this session's connection pool, so repeated calls to
+        # the webhook reuse an open connection instead of a new TLS handshake
+        self.session = session or requests.Session()
+        
         if not self.webhook_url and self.is_enabled:
             print("Warning: N8N_WEBHOOK_URL not set in environment variables but USE_N8N is true")
         
@@ -99,41 +103,7 @@ class WebhookManager:
         print(f"Payload: {json.dumps(payload, indent=2)}")
         print(f"SSL Verification: {'Enabled' if self.verify_ssl else 'Disabled'}")
             
-        try:
-            # Add timeout to prevent hanging if the webhook is unreachable
-            headers = {'Content-Type': 'application/json'}
-            response = requests.post(
-                self.webhook_url, 
-                json=payload, 
-                timeout=30,
-                headers=headers,
-                verify=self.verify_ssl  # Skip SSL verification if needed
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.Timeout:
-            print("Timeout error: The request to n8n took too long to complete")
-            return {"error": "Request timeout. The n8n webhook took too long to respond."}
-        except requests.exceptions.SSLError as e:
-            print(f"SSL Error: {e}")
-            print("Consider setting verify_ssl=False if you trust this endpoint.")
-            return {"error": f"SSL verification failed: {e}"}
-        except requests.exceptions.ConnectionError as e:
-            print(f"Connection error: Could not connect to the n8n webhook. Error: {e}")
-            return {"error": "Connection error. Could not connect to the n8n webhook."}
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP error: The n8n webhook returned an error status: {e}")
-            return {"error": f"HTTP error: {e}"}
-        except requests.exceptions.RequestException as e:
-            print(f"Error sending research request to n8n: {e}")
-            return {"error": str(e)}
-        except json.JSONDecodeError:
-            print("Error: The response from n8n is not valid JSON")
-            # Try to return the raw text
-            try:
-                return {"error": "Invalid JSON response", "raw_response": response.text}
-            except:
-                return {"error": "Invalid response format from n8n webhook"}
+        return self._post(payload, "research request")
     
     def send_prompt_enhancement_request(self, prompt, document_context=None):
         """
@@ -162,15 +132,28 @@ class WebhookManager:
             
         print(f"Sending prompt enhancement request to: {self.webhook_url}")
             
+        return self._post(payload, "prompt enhancement request")
+    
+    def _post(self, payload, request_name):
+        """
+        Send a payload to the webhook and return the decoded response.
+        
+        Args:
+            payload (dict): The JSON payload to send
+            request_name (str): Name of the request type, used in log messages
+            
+        Returns:
+            dict: The response data from n8n, or a dict with an "error" key
+        """
         try:
             # Add timeout to prevent hanging if the webhook is unreachable
             headers = {'Content-Type': 'application/json'}
-            response = requests.post(
+            response = self.session.post(
                 self.webhook_url, 
                 json=payload, 
                 timeout=30,
                 headers=headers,
-                verify=self.verify_ssl
+                verify=self.verify_ssl  # Skip SSL verification if needed
             )
             response.raise_for_status()
             return response.json()
@@ -188,7 +171,7 @@ class WebhookManager:
             print(f"HTTP error: The n8n webhook returned an error status: {e}")
             return {"error": f"HTTP error: {e}"}
         except requests.exceptions.RequestException as e:
-            print(f"Error sending prompt enhancement request to n8n: {e}")
+            print(f"Error sending {request_name} to n8n: {e}")
             return {"error": str(e)}
         except json.JSONDecodeError:
             print("Error: The response from n8n is not valid JSON")